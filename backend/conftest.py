@@ -0,0 +1,22 @@
+"""
+Shared pytest fixtures for the Synapse backend integration tests.
+"""
+
+import httpx
+import pytest
+
+BASE_URL = "http://127.0.0.1:8000"
+TIMEOUT = 30
+
+@pytest.fixture(scope="session")
+def server_ready():
+    """Check once per test session that the backend is running."""
+    response = httpx.get(f"{BASE_URL}/", timeout=TIMEOUT)
+    assert response.status_code == 200, f"Backend health check failed: {response.status_code}"
+    assert "Synapse API is running" in response.json()["message"]
+
+@pytest.fixture(autouse=True)
+def require_server(request):
+    """Probe the backend before tests in modules that talk to it (those defining BASE_URL)."""
+    if hasattr(request.module, "BASE_URL"):
+        request.getfixturevalue("server_ready")
@@ -1,55 +1,308 @@
 """
 Custom OpenAI Embedding wrapper that bypasses LlamaIndex's API key handling issues
 """
-from typing import List
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import httpx
+import numpy as np
+import tiktoken
 from llama_index.core.embeddings import BaseEmbedding
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from embedding_cache import EmbeddingCache, embedding_cache
+from openai_retry import acall_with_retry, call_with_retry, embedding_rate_limiter
 from settings import settings
 
+# OpenAI rejects embedding requests with more than 2048 inputs or ~300k tokens in total
+MAX_BATCH_SIZE = 2048
+MAX_BATCH_TOKENS = 300_000
+
+# tiktoken releases the GIL while encoding, so batch token counting scales across cores
+TOKENIZER_THREADS = os.cpu_count() or 8
+
+# Number of recent query embeddings kept in process memory
+QUERY_CACHE_SIZE = 4096
+
+# Concurrent single-text async requests are buffered for up to this many seconds
+# (or until this many are waiting) and then embedded together as one batch
+COALESCE_WINDOW = 0.01
+COALESCE_MAX_ITEMS = 64
+
+# Connection pool shared by every OpenAI request made by the backend
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+HTTP_TIMEOUT = 60.0
+
+# Pooled HTTP/2 connections, reused by the embedding clients below and by the
+# LLM clients in main.py, so concurrent requests multiplex over warm connections
+http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT, http2=True)
+async_http_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT, http2=True)
+
+# Module-level clients so all embedding instances reuse the same pooled connections.
+# Retries are handled by openai_retry so they share the rate limiter.
+openai_client = OpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL,
+    max_retries=0,
+    http_client=http_client
+)
+async_openai_client = AsyncOpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL,
+    max_retries=0,
+    http_client=async_http_client
+)
+
+# In-process LRU of query embeddings keyed by (model, query); repeated questions
+# skip both the API and the persistent cache lookup
+_query_cache: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def _query_cache_get(key: Tuple[str, str]) -> Optional[np.ndarray]:
+    """Return a cached query embedding and mark it as recently used"""
+    with _query_cache_lock:
+        embedding = _query_cache.get(key)
+        if embedding is not None:
+            _query_cache.move_to_end(key)
+        return embedding
+
+
+def _query_cache_put(key: Tuple[str, str], embedding: List[float]) -> None:
+    """Cache a query embedding, evicting the least recently used entry when full"""
+    with _query_cache_lock:
+        _query_cache[key] = np.asarray(embedding, dtype=np.float32)
+        _query_cache.move_to_end(key)
+        if len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """Get (and cache) the tiktoken encoding used by an embedding model"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
 
 class CustomOpenAIEmbedding(BaseEmbedding):
     """Custom OpenAI embedding that uses direct OpenAI client"""
-    
-    def __init__(self, model: str = "text-embedding-3-small", **kwargs):
-        super().__init__(**kwargs)
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        embed_batch_size: int = 1024,
+        max_concurrency: int = 8,
+        use_cache: bool = True,
+        dimensions: Optional[int] = settings.EMBEDDING_DIMENSIONS,
+        **kwargs
+    ):
+        """
+        Args:
+            model: OpenAI embedding model name
+            embed_batch_size: Maximum number of texts sent in one request
+            max_concurrency: Maximum number of batch requests in flight in the async path
+            use_cache: Whether to read and write the persistent embedding cache
+            dimensions: Truncate text-embedding-3 vectors to this size (None keeps the
+                model default). Changing it requires re-indexing existing collections.
+        """
+        super().__init__(embed_batch_size=min(embed_batch_size, MAX_BATCH_SIZE), **kwargs)
         self._model = model
-        self._client = OpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_BASE_URL
-        )
-    
+        self._dimensions = dimensions
+        # Identifies the vector space in cache keys, so truncated vectors never mix with full ones
+        self._cache_model = model if dimensions is None else f"{model}@{dimensions}"
+        self._request_params = {"model": model}
+        if dimensions is not None:
+            self._request_params["dimensions"] = dimensions
+        self._max_concurrency = max_concurrency
+        self._cache: Optional[EmbeddingCache] = embedding_cache if use_cache else None
+        self._client = openai_client
+        self._aclient = async_openai_client
+        # Buffer of (text, future) waiting to be embedded together, and the flushes in flight
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_tasks: set = set()
+
+    def _plan_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Group text indices into batches that stay under the per-request item and token limits.
+
+        Texts are ordered by token count first so each request carries similarly sized
+        inputs and a single long text does not dominate the latency of a whole batch.
+        """
+        encoding = get_encoding(self._model)
+        token_counts = [len(tokens) for tokens in encoding.encode_ordinary_batch(texts, num_threads=TOKENIZER_THREADS)]
+        order = sorted(range(len(texts)), key=token_counts.__getitem__)
+
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens = 0
+        for i in order:
+            if batch and (
+                len(batch) >= self.embed_batch_size
+                or batch_tokens + token_counts[i] > MAX_BATCH_TOKENS
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(i)
+            batch_tokens += token_counts[i]
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _cache_lookup(self, texts: List[str]) -> Tuple[List[Optional[np.ndarray]], List[int]]:
+        """Return cached embeddings (None where missing) and the indices of the misses"""
+        if self._cache is None:
+            return [None] * len(texts), list(range(len(texts)))
+        keys = [self._cache.make_key(self._cache_model, text) for text in texts]
+        found = self._cache.get_many(keys)
+        embeddings = [found.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        return embeddings, missing
+
+    def _cache_store(self, texts: List[str], embeddings: List[np.ndarray]) -> None:
+        """Persist freshly computed embeddings"""
+        if self._cache is not None:
+            self._cache.set_many({
+                self._cache.make_key(self._cache_model, text): embedding
+                for text, embedding in zip(texts, embeddings)
+            })
+
     def _get_query_embedding(self, query: str) -> List[float]:
         """Get embedding for a query"""
-        response = self._client.embeddings.create(
-            input=query,
-            model=self._model
-        )
-        return response.data[0].embedding
-    
+        key = (self._cache_model, query)
+        cached = _query_cache_get(key)
+        if cached is not None:
+            return cached.tolist()
+        embedding = self._get_text_embeddings([query])[0]
+        _query_cache_put(key, embedding)
+        return embedding
+
     def _get_text_embedding(self, text: str) -> List[float]:
         """Get embedding for text"""
-        response = self._client.embeddings.create(
-            input=text,
-            model=self._model
-        )
-        return response.data[0].embedding
-    
+        return self._get_text_embeddings([text])[0]
+
+    @staticmethod
+    def _fan_out(texts: List[str], unique_texts: List[str], embeddings: List[np.ndarray]) -> List[List[float]]:
+        """Map embeddings of the unique texts back onto the caller's (possibly repeated) inputs"""
+        by_text = dict(zip(unique_texts, embeddings))
+        # LlamaIndex expects plain lists at the BaseEmbedding boundary
+        return [by_text[text].tolist() for text in texts]
+
     def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings for multiple texts"""
-        response = self._client.embeddings.create(
-            input=texts,
-            model=self._model
-        )
-        return [data.embedding for data in response.data]
-    
+        """Get embeddings for multiple texts, only sending unique cache misses to the API"""
+        unique_texts = list(dict.fromkeys(texts))
+        embeddings, missing = self._cache_lookup(unique_texts)
+        if missing:
+            missing_texts = [unique_texts[i] for i in missing]
+            fresh = self._embed_texts(missing_texts)
+            self._cache_store(missing_texts, fresh)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+        return self._fan_out(texts, unique_texts, embeddings)
+
+    def _embed_texts(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts with the API, split into length-sorted batches"""
+        embeddings: List[np.ndarray] = [None] * len(texts)
+        for batch in self._plan_batches(texts):
+            response = call_with_retry(
+                self._client.embeddings.create,
+                input=[texts[i] for i in batch],
+                **self._request_params,
+                limiter=embedding_rate_limiter
+            )
+            self._scatter(embeddings, batch, response.data)
+        return embeddings
+
+    @staticmethod
+    def _scatter(embeddings: List[np.ndarray], batch: List[int], data_list: list) -> None:
+        """Store a batch response as float32 rows in the caller's order"""
+        vectors = np.asarray([data.embedding for data in data_list], dtype=np.float32)
+        for data, vector in zip(data_list, vectors):
+            embeddings[batch[data.index]] = vector
+
     async def _aget_query_embedding(self, query: str) -> List[float]:
         """Async version of get_query_embedding"""
-        return self._get_query_embedding(query)
-    
+        key = (self._cache_model, query)
+        cached = _query_cache_get(key)
+        if cached is not None:
+            return cached.tolist()
+        embedding = (await self._aget_text_embeddings([query]))[0]
+        _query_cache_put(key, embedding)
+        return embedding
+
     async def _aget_text_embedding(self, text: str) -> List[float]:
-        """Async version of get_text_embedding"""
-        return self._get_text_embedding(text)
-    
+        """Async version of get_text_embedding, coalescing concurrent calls into one batch request"""
+        loop = asyncio.get_running_loop()
+        if self._pending and self._pending[0][1].get_loop() is not loop:
+            # Leftovers from an event loop that has since been closed
+            self._pending = []
+
+        future = loop.create_future()
+        pending = self._pending
+        pending.append((text, future))
+        if len(pending) >= COALESCE_MAX_ITEMS:
+            self._start_flush(pending)
+        elif len(pending) == 1:
+            loop.call_later(COALESCE_WINDOW, self._start_flush, pending)
+        return await future
+
+    def _start_flush(self, pending: List[Tuple[str, asyncio.Future]]) -> None:
+        """Close the buffer if it is still open and embed its texts in the background"""
+        if pending is not self._pending:
+            # Already flushed because it filled up before the window expired
+            return
+        self._pending = []
+        task = asyncio.get_running_loop().create_task(self._flush(pending))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, pending: List[Tuple[str, asyncio.Future]]) -> None:
+        """Embed a closed buffer in one batch and resolve each waiting caller"""
+        try:
+            embeddings = await self._aget_text_embeddings([text for text, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), embedding in zip(pending, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
     async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Async version of get_text_embeddings"""
-        return self._get_text_embeddings(texts)
\ No newline at end of file
+        unique_texts = list(dict.fromkeys(texts))
+        embeddings, missing = self._cache_lookup(unique_texts)
+        if missing:
+            missing_texts = [unique_texts[i] for i in missing]
+            fresh = await self._aembed_texts(missing_texts)
+            self._cache_store(missing_texts, fresh)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+        return self._fan_out(texts, unique_texts, embeddings)
+
+    async def _aembed_texts(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts with the API, sending up to max_concurrency batches at once"""
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def embed_batch(batch: List[int]) -> Tuple[List[int], list]:
+            async with semaphore:
+                response = await acall_with_retry(
+                    self._aclient.embeddings.create,
+                    input=[texts[i] for i in batch],
+                    **self._request_params,
+                    limiter=embedding_rate_limiter
+                )
+            return batch, response.data
+
+        results = await asyncio.gather(
+            *(embed_batch(batch) for batch in self._plan_batches(texts))
+        )
+
+        embeddings: List[np.ndarray] = [None] * len(texts)
+        for batch, data_list in results:
+            self._scatter(embeddings, batch, data_list)
+        return embeddings
@@ -4,9 +4,75 @@ Debug script to directly inspect ChromaDB database for context isolation verific
 """
 
 import chromadb
+import sqlite3
+from collections import Counter
 from pathlib import Path
 import json
 
+# Number of rows fetched per collection.get() call
+PAGE_SIZE = 1000
+
+def iter_documents(collection, where=None, include=("metadatas", "documents")):
+    """Yield (id, metadata, document) rows one page at a time, never fetching embeddings"""
+    offset = 0
+    while True:
+        page = collection.get(where=where, include=list(include), limit=PAGE_SIZE, offset=offset)
+        if not page['ids']:
+            return
+        metadatas = page.get('metadatas') or [None] * len(page['ids'])
+        documents = page.get('documents') or [None] * len(page['ids'])
+        yield from zip(page['ids'], metadatas, documents)
+        offset += PAGE_SIZE
+
+# Per-context document counts straight from Chroma's SQLite metadata table
+CONTEXT_COUNTS_SQL = """
+    SELECT m.string_value, COUNT(*)
+    FROM embedding_metadata m
+    JOIN embeddings e ON e.id = m.id
+    JOIN segments s ON s.id = e.segment_id
+    JOIN collections c ON c.id = s.collection
+    WHERE c.name = ? AND m.key = 'contextId'
+    GROUP BY m.string_value
+"""
+
+def count_contexts_sqlite(db_path, collection_name):
+    """Count documents per contextId with one aggregate query, or None if the schema is unexpected"""
+    sqlite_path = db_path / "chroma.sqlite3"
+    if not sqlite_path.exists():
+        return None
+    try:
+        con = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+        try:
+            return Counter(dict(con.execute(CONTEXT_COUNTS_SQL, (collection_name,)).fetchall()))
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        print(f"⚠️  SQLite fast path unavailable ({e}), counting through the Chroma client")
+        return None
+
+def has_matching_document(collection, context_id, phrases):
+    """Check whether any document in a context contains one of the phrases"""
+    conditions = [{"$contains": phrase} for phrase in phrases]
+    where_document = conditions[0] if len(conditions) == 1 else {"$or": conditions}
+    
+    try:
+        # limit=1 with no included fields makes this a pure existence check
+        matches = collection.get(
+            where={"contextId": context_id},
+            where_document=where_document,
+            limit=1,
+            include=[]
+        )
+    except ValueError:
+        # Older Chroma versions reject $or in where_document: scan client-side,
+        # stopping (and fetching no further pages) at the first match
+        documents = (
+            document for _, _, document
+            in iter_documents(collection, where={"contextId": context_id}, include=["documents"])
+        )
+        return any(phrase in document for document in documents for phrase in phrases)
+    return bool(matches['ids'])
+
 def inspect_database():
     """Inspect the ChromaDB database directly to verify context isolation"""
     print("🔍 Inspecting ChromaDB Database for Context Isolation")
@@ -24,73 +90,68 @@ def inspect_database():
         # Get the main collection
         collection = client.get_collection("synapse_knowledge_base")
         print(f"✅ Found collection: {collection.name}")
-        print(f"📊 Total documents in collection: {collection.count()}")
+        total_documents = collection.count()
+        print(f"📊 Total documents in collection: {total_documents}")
         
-        # Get all documents
-        all_docs = collection.get()
-        print(f"📄 Retrieved {len(all_docs['documents'])} documents")
+        # Fast path: aggregate the counts inside SQLite without going through the client
+        context_counts = count_contexts_sqlite(db_path, collection.name)
+        if context_counts is not None:
+            untagged = total_documents - sum(context_counts.values())
+            if untagged:
+                context_counts['no-context'] = untagged
         
-        # Group documents by contextId
-        context_groups = {}
-        for i, metadata in enumerate(all_docs['metadatas']):
+        # Stream all documents page by page for the content preview
+        print("\n📄 Documents")
+        print("-" * 40)
+        streamed_counts = Counter()
+        for doc_id, metadata, document in iter_documents(collection):
             context_id = metadata.get('contextId', 'no-context')
-            if context_id not in context_groups:
-                context_groups[context_id] = []
-            context_groups[context_id].append({
-                'id': all_docs['ids'][i],
-                'metadata': metadata,
-                'content_preview': all_docs['documents'][i][:100] + "..." if len(all_docs['documents'][i]) > 100 else all_docs['documents'][i]
-            })
+            streamed_counts[context_id] += 1
+            
+            filename = metadata.get('filename', 'unknown')
+            source = metadata.get('source', 'unknown')
+            content_preview = document[:100] + "..." if len(document) > 100 else document
+            print(f"   - [{context_id}] {filename} (source: {source})")
+            print(f"     Content: {content_preview}")
         
-        print(f"\n📋 Context Groups Found: {len(context_groups)}")
+        print(f"\n📄 Retrieved {sum(streamed_counts.values())} documents")
+        if context_counts is None:
+            context_counts = streamed_counts
+        
+        print(f"\n📋 Context Groups Found: {len(context_counts)}")
         print("-" * 40)
         
-        for context_id, docs in context_groups.items():
-            print(f"\n🏷️  Context: {context_id}")
-            print(f"   Documents: {len(docs)}")
-            
-            for doc in docs:
-                filename = doc['metadata'].get('filename', 'unknown')
-                source = doc['metadata'].get('source', 'unknown')
-                print(f"   - {filename} (source: {source})")
-                print(f"     Content: {doc['content_preview']}")
+        for context_id, count in context_counts.items():
+            print(f"🏷️  Context: {context_id}")
+            print(f"   Documents: {count}")
         
         # Test specific context queries
         print(f"\n🔍 Testing Context-Specific Queries")
         print("-" * 40)
         
-        # Query for test-project-alpha context
-        alpha_docs = collection.get(where={"contextId": "test-project-alpha"})
-        print(f"📁 test-project-alpha: {len(alpha_docs['documents'])} documents")
-        for i, metadata in enumerate(alpha_docs['metadatas']):
-            filename = metadata.get('filename', 'unknown')
-            print(f"   - {filename}")
-        
-        # Query for test-project-bravo context
-        bravo_docs = collection.get(where={"contextId": "test-project-bravo"})
-        print(f"📁 test-project-bravo: {len(bravo_docs['documents'])} documents")
-        for i, metadata in enumerate(bravo_docs['metadatas']):
-            filename = metadata.get('filename', 'unknown')
-            print(f"   - {filename}")
+        # Query for each test context, streaming only the metadata
+        for context_id in ("test-project-alpha", "test-project-bravo"):
+            count = 0
+            print(f"📁 {context_id}:")
+            for _, metadata, _ in iter_documents(collection, where={"contextId": context_id}, include=["metadatas"]):
+                count += 1
+                filename = metadata.get('filename', 'unknown')
+                print(f"   - {filename}")
+            print(f"   {count} documents")
         
         # Verify isolation
         print(f"\n✅ Data Isolation Verification")
         print("-" * 40)
         
-        alpha_has_bravo_data = False
-        bravo_has_alpha_data = False
-        
         # Check if alpha context has any bravo-specific content
-        for doc in alpha_docs['documents']:
-            if 'Yellow Sparrow' in doc or 'Project Bravo' in doc:
-                alpha_has_bravo_data = True
-                break
+        alpha_has_bravo_data = has_matching_document(
+            collection, "test-project-alpha", ["Yellow Sparrow", "Project Bravo"]
+        )
         
         # Check if bravo context has any alpha-specific content  
-        for doc in bravo_docs['documents']:
-            if 'Blue Parrot' in doc or 'Project Alpha' in doc or 'Red Dragon' in doc:
-                bravo_has_alpha_data = True
-                break
+        bravo_has_alpha_data = has_matching_document(
+            collection, "test-project-bravo", ["Blue Parrot", "Project Alpha", "Red Dragon"]
+        )
         
         if not alpha_has_bravo_data and not bravo_has_alpha_data:
             print("✅ Data isolation VERIFIED: No cross-context contamination detected")
@@ -8,34 +8,34 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+from llama_index.core import Settings, Document
+from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.llms.openai import OpenAI as LlamaOpenAI
+from llama_index.vector_stores.chroma import ChromaVectorStore
+from llama_index.core import VectorStoreIndex
+from vector_store_client import get_vector_store_client
+from settings import settings
+
+# Create the vector store client first: it installs its own embedding model in the global
+# Settings, which the OpenAIEmbedding configured below must replace
+vector_store = get_vector_store_client()
+
+# Configure LlamaIndex settings once at import time so their HTTP clients are reused
+Settings.embed_model = OpenAIEmbedding(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL
+)
+Settings.llm = LlamaOpenAI(
+    model="gpt-4o-mini", 
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL
+)
+
 def test_index_insert():
     """Test the index.insert() operation that's causing the 401 error"""
     print("🔍 Testing index.insert() operation...")
     
     try:
-        # Configure LlamaIndex settings
-        from llama_index.core import Settings, Document
-        from llama_index.embeddings.openai import OpenAIEmbedding
-        from llama_index.llms.openai import OpenAI as LlamaOpenAI
-        from llama_index.vector_stores.chroma import ChromaVectorStore
-        from llama_index.core import VectorStoreIndex
-        from vector_store_client import vector_store
-        from settings import settings
-        
-        print("✅ Imports successful")
-        
-        # Configure LlamaIndex settings
-        Settings.embed_model = OpenAIEmbedding(
-            api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_BASE_URL
-        )
-        Settings.llm = LlamaOpenAI(
-            model="gpt-4o-mini", 
-            api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_BASE_URL
-        )
-        print("✅ LlamaIndex settings configured")
-        
         # Create ChromaVectorStore from existing collection
         chroma_vector_store = ChromaVectorStore(chroma_collection=vector_store.collection)
         print("✅ ChromaVectorStore created")
@@ -3,43 +3,58 @@
 Debug script to test query functionality and see what's in the database
 """
 
-import requests
-import json
+import asyncio
+import httpx
+
+async def test_query(client, context_id, question):
+    """Test a query with specific context and return the report lines"""
+    lines = [f"\n🔍 Testing query in context '{context_id}': {question}"]
 
-def test_query(context_id, question):
-    """Test a query with specific context"""
-    print(f"\n🔍 Testing query in context '{context_id}': {question}")
-    
     payload = {
         'question': question,
         'contextId': context_id
     }
-    
+
     try:
-        response = requests.post('http://127.0.0.1:8000/api/query', json=payload, timeout=30)
-        print(f"Status: {response.status_code}")
-        
+        response = await client.post('/api/query', json=payload)
+        lines.append(f"Status: {response.status_code}")
+
         if response.status_code == 200:
             result = response.json()
-            print(f"Answer: {result['answer'][:300]}...")
-            print(f"Sources: {len(result['sources'])}")
-            
+            lines.append(f"Answer: {result['answer'][:300]}...")
+            lines.append(f"Sources: {len(result['sources'])}")
+
             for i, source in enumerate(result['sources']):
                 metadata = source.get('metadata', {})
-                print(f"  Source {i}: contextId={metadata.get('contextId')}, filename={metadata.get('filename')}, source={metadata.get('source')}")
-                print(f"    Content preview: {source.get('content', '')[:100]}...")
+                lines.append(f"  Source {i}: contextId={metadata.get('contextId')}, filename={metadata.get('filename')}, source={metadata.get('source')}")
+                lines.append(f"    Content preview: {source.get('content', '')[:100]}...")
         else:
-            print(f"Error: {response.text}")
-            
+            lines.append(f"Error: {response.text}")
+
     except Exception as e:
-        print(f"Exception: {e}")
+        lines.append(f"Exception: {e}")
+
+    return lines
+
+async def run_queries(queries):
+    """Run all queries concurrently, printing each report once it is complete"""
+    async with httpx.AsyncClient(base_url='http://127.0.0.1:8000', timeout=30) as client:
+        reports = await asyncio.gather(
+            *(test_query(client, context_id, question) for context_id, question in queries)
+        )
+
+    # Print in submission order so output from concurrent queries doesn't interleave
+    for lines in reports:
+        print("\n".join(lines))
 
 if __name__ == "__main__":
     print("Debug Query Test")
     print("=" * 50)
-    
+
     # Test queries in both contexts
-    test_query("project-a", "What documents are available?")
-    test_query("project-b", "What documents are available?")
-    test_query("project-a", "Tell me about fruit")
-    test_query("project-b", "Tell me about fruit")
\ No newline at end of file
+    asyncio.run(run_queries([
+        ("project-a", "What documents are available?"),
+        ("project-b", "What documents are available?"),
+        ("project-a", "Tell me about fruit"),
+        ("project-b", "Tell me about fruit"),
+    ]))
@@ -3,12 +3,16 @@
 Detailed debug script to understand SlackReader's message processing
 """
 import os
+import re
 import json
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Markers that usually start a new message inside a SlackReader document
+MESSAGE_INDICATORS = re.compile(r"User:|@|\[")
+
 def debug_slack_reader_detailed():
     """Debug SlackReader's message processing in detail"""
     print("🔍 Detailed SlackReader debugging...")
@@ -16,6 +20,7 @@ def debug_slack_reader_detailed():
     try:
         from llama_index.readers.slack import SlackReader
         from slack_sdk import WebClient
+        from slack_history import fetch_channel_history, fetch_histories, list_channels
         
         slack_token = os.getenv("SLACK_BOT_TOKEN")
         if not slack_token:
@@ -29,66 +34,62 @@ def debug_slack_reader_detailed():
         
         print("\n📋 Checking available channels...")
         try:
-            channels_response = client.conversations_list(types="public_channel,private_channel")
-            if channels_response["ok"]:
-                channels = channels_response["channels"]
-                print(f"✅ Found {len(channels)} channels:")
-                for channel in channels[:5]:  # Show first 5 channels
-                    print(f"   - {channel['name']} (ID: {channel['id']})")
+            channels = list_channels(client)
+            print(f"✅ Found {len(channels)} channels:")
+            shown_channels = channels[:5]  # Show first 5 channels
+            
+            # Fetch recent history of the shown member channels concurrently
+            member_ids = [channel['id'] for channel in shown_channels if channel.get('is_member')]
+            histories = fetch_histories(client, member_ids, limit=10)
+            for channel in shown_channels:
+                recent = histories.get(channel['id'])
+                recent_info = f", {len(recent)} recent messages" if recent is not None else ""
+                print(f"   - {channel['name']} (ID: {channel['id']}){recent_info}")
+            
+            # Use the first available channel for testing
+            if channels:
+                test_channel_id = channels[0]["id"]
+                test_channel_name = channels[0]["name"]
+                print(f"\n🎯 Using channel '{test_channel_name}' (ID: {test_channel_id}) for testing")
                 
-                # Use the first available channel for testing
-                if channels:
-                    test_channel_id = channels[0]["id"]
-                    test_channel_name = channels[0]["name"]
-                    print(f"\n🎯 Using channel '{test_channel_name}' (ID: {test_channel_id}) for testing")
+                # Check messages in this channel
+                print(f"\n📨 Checking messages in #{test_channel_name}...")
+                try:
+                    messages = histories.get(test_channel_id)
+                    if messages is None:
+                        messages = fetch_channel_history(client, test_channel_id, limit=10)
+                    print(f"✅ Found {len(messages)} messages in channel")
                     
-                    # Check messages in this channel
-                    print(f"\n📨 Checking messages in #{test_channel_name}...")
-                    try:
-                        history_response = client.conversations_history(
-                            channel=test_channel_id,
-                            limit=10
-                        )
-                        if history_response["ok"]:
-                            messages = history_response["messages"]
-                            print(f"✅ Found {len(messages)} messages in channel")
-                            
-                            for i, msg in enumerate(messages[:3]):  # Show first 3 messages
-                                text = msg.get("text", "")[:100]
-                                user = msg.get("user", "unknown")
-                                ts = msg.get("ts", "")
-                                print(f"   Message {i+1}: User {user}, TS: {ts}")
-                                print(f"   Text: {text}...")
-                                
-                            # Now test SlackReader with this real channel
-                            print(f"\n🤖 Testing SlackReader with real channel {test_channel_id}...")
-                            reader = SlackReader(slack_token=slack_token)
-                            documents = reader.load_data(channel_ids=[test_channel_id])
-                            
-                            print(f"✅ SlackReader returned {len(documents)} documents")
-                            
-                            for i, doc in enumerate(documents):
-                                print(f"\n📄 Document {i+1}:")
-                                print(f"   Text length: {len(doc.text)} characters")
-                                print(f"   Metadata keys: {list(doc.metadata.keys())}")
-                                print(f"   First 200 chars: {doc.text[:200]}...")
-                                
-                                # Count how many individual messages are in this document
-                                # Messages in Slack are often separated by timestamps or user mentions
-                                message_indicators = doc.text.count("User:") + doc.text.count("@") + doc.text.count("[")
-                                print(f"   Estimated messages in document: {message_indicators}")
-                                
-                        else:
-                            print(f"❌ Failed to get channel history: {history_response['error']}")
-                            
-                    except Exception as e:
-                        print(f"❌ Error checking channel history: {e}")
+                    for i, msg in enumerate(messages[:3]):  # Show first 3 messages
+                        text = msg.get("text", "")[:100]
+                        user = msg.get("user", "unknown")
+                        ts = msg.get("ts", "")
+                        print(f"   Message {i+1}: User {user}, TS: {ts}")
+                        print(f"   Text: {text}...")
+                        
+                    # Now test SlackReader, the reader /api/sync/slack uses, with this real channel
+                    print(f"\n🤖 Testing SlackReader with real channel {test_channel_id}...")
+                    reader = SlackReader(slack_token=slack_token)
+                    documents = reader.load_data(channel_ids=[test_channel_id])
+                    
+                    print(f"✅ SlackReader returned {len(documents)} documents")
+                    
+                    for i, doc in enumerate(documents):
+                        print(f"\n📄 Document {i+1}:")
+                        print(f"   Text length: {len(doc.text)} characters")
+                        print(f"   Metadata keys: {list(doc.metadata.keys())}")
+                        print(f"   First 200 chars: {doc.text[:200]}...")
+                        
+                        # Count how many individual messages are in this document
+                        # Messages in Slack are often separated by timestamps or user mentions
+                        message_indicators = sum(1 for _ in MESSAGE_INDICATORS.finditer(doc.text))
+                        print(f"   Estimated messages in document: {message_indicators}")
                         
-                else:
-                    print("❌ No channels available for testing")
+                except Exception as e:
+                    print(f"❌ Error checking channel history: {e}")
                     
             else:
-                print(f"❌ Failed to list channels: {channels_response['error']}")
+                print("❌ No channels available for testing")
                 
         except Exception as e:
             print(f"❌ Error listing channels: {e}")
@@ -4,11 +4,32 @@ Debug script to join channels and test SlackReader
 """
 import os
 import json
+import asyncio
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Maximum number of conversations.join calls in flight at once
+JOIN_CONCURRENCY = 5
+
+async def join_channels(slack_token, channels):
+    """Join channels concurrently and return each channel's response or exception"""
+    from slack_sdk.errors import SlackApiError
+    from slack_sdk.web.async_client import AsyncWebClient
+
+    aclient = AsyncWebClient(token=slack_token)
+    semaphore = asyncio.Semaphore(JOIN_CONCURRENCY)
+
+    async def join(channel):
+        async with semaphore:
+            try:
+                return await aclient.conversations_join(channel=channel['id'])
+            except SlackApiError as e:
+                return e
+
+    return await asyncio.gather(*(join(channel) for channel in channels))
+
 def debug_with_channel_join():
     """Debug SlackReader after joining channels"""
     print("🔍 Debugging SlackReader with channel joining...")
@@ -16,6 +37,7 @@ def debug_with_channel_join():
     try:
         from llama_index.readers.slack import SlackReader
         from slack_sdk import WebClient
+        from slack_history import fetch_channel_history, list_channels
         
         slack_token = os.getenv("SLACK_BOT_TOKEN")
         if not slack_token:
@@ -28,89 +50,75 @@ def debug_with_channel_join():
         
         print("\n📋 Checking available channels...")
         try:
-            channels_response = client.conversations_list(types="public_channel,private_channel")
-            if channels_response["ok"]:
-                channels = channels_response["channels"]
-                print(f"✅ Found {len(channels)} channels:")
-                
-                for channel in channels:
-                    channel_id = channel['id']
+            channels = list_channels(client)
+            print(f"✅ Found {len(channels)} channels:")
+            
+            for channel in channels:
+                is_member = channel.get('is_member', False)
+                print(f"   - {channel['name']} (ID: {channel['id']}) - Member: {is_member}")
+            
+            # Join every channel the bot is not a member of, in parallel
+            to_join = [channel for channel in channels if not channel.get('is_member', False)]
+            if to_join:
+                print(f"\n🔗 Attempting to join {len(to_join)} channels...")
+                results = asyncio.run(join_channels(slack_token, to_join))
+                for channel, result in zip(to_join, results):
                     channel_name = channel['name']
-                    is_member = channel.get('is_member', False)
-                    print(f"   - {channel_name} (ID: {channel_id}) - Member: {is_member}")
-                    
-                    # Try to join the channel if not a member
-                    if not is_member:
-                        print(f"   🔗 Attempting to join #{channel_name}...")
-                        try:
-                            join_response = client.conversations_join(channel=channel_id)
-                            if join_response["ok"]:
-                                print(f"   ✅ Successfully joined #{channel_name}")
-                            else:
-                                print(f"   ❌ Failed to join #{channel_name}: {join_response['error']}")
-                        except Exception as e:
-                            print(f"   ❌ Error joining #{channel_name}: {e}")
+                    if isinstance(result, Exception):
+                        print(f"   ❌ Error joining #{channel_name}: {result}")
+                    elif result["ok"]:
+                        print(f"   ✅ Successfully joined #{channel_name}")
+                    else:
+                        print(f"   ❌ Failed to join #{channel_name}: {result['error']}")
+            
+            # Now test with the first channel
+            if channels:
+                test_channel = channels[0]
+                test_channel_id = test_channel["id"]
+                test_channel_name = test_channel["name"]
+                
+                print(f"\n🎯 Testing SlackReader with #{test_channel_name} (ID: {test_channel_id})")
                 
-                # Now test with the first channel
-                if channels:
-                    test_channel = channels[0]
-                    test_channel_id = test_channel["id"]
-                    test_channel_name = test_channel["name"]
+                # Check messages first
+                print(f"📨 Checking messages in #{test_channel_name}...")
+                try:
+                    messages = fetch_channel_history(client, test_channel_id, limit=20)
+                    print(f"✅ Found {len(messages)} messages in channel")
                     
-                    print(f"\n🎯 Testing SlackReader with #{test_channel_name} (ID: {test_channel_id})")
+                    # Show message details
+                    for i, msg in enumerate(messages[:5]):
+                        text = msg.get("text", "")
+                        user = msg.get("user", "unknown")
+                        ts = msg.get("ts", "")
+                        msg_type = msg.get("type", "message")
+                        subtype = msg.get("subtype", "")
+                        
+                        print(f"   Message {i+1}: Type={msg_type}, Subtype={subtype}")
+                        print(f"     User: {user}, TS: {ts}")
+                        print(f"     Text: {text[:100]}...")
+                        
+                    # Now test SlackReader, the reader /api/sync/slack uses
+                    print(f"\n🤖 Testing SlackReader with {len(messages)} messages...")
+                    reader = SlackReader(slack_token=slack_token)
+                    documents = reader.load_data(channel_ids=[test_channel_id])
                     
-                    # Check messages first
-                    print(f"📨 Checking messages in #{test_channel_name}...")
-                    try:
-                        history_response = client.conversations_history(
-                            channel=test_channel_id,
-                            limit=20
-                        )
-                        if history_response["ok"]:
-                            messages = history_response["messages"]
-                            print(f"✅ Found {len(messages)} messages in channel")
-                            
-                            # Show message details
-                            for i, msg in enumerate(messages[:5]):
-                                text = msg.get("text", "")
-                                user = msg.get("user", "unknown")
-                                ts = msg.get("ts", "")
-                                msg_type = msg.get("type", "message")
-                                subtype = msg.get("subtype", "")
-                                
-                                print(f"   Message {i+1}: Type={msg_type}, Subtype={subtype}")
-                                print(f"     User: {user}, TS: {ts}")
-                                print(f"     Text: {text[:100]}...")
-                                
-                            # Now test SlackReader
-                            print(f"\n🤖 Testing SlackReader with {len(messages)} messages...")
-                            reader = SlackReader(slack_token=slack_token)
-                            documents = reader.load_data(channel_ids=[test_channel_id])
-                            
-                            print(f"✅ SlackReader returned {len(documents)} documents from {len(messages)} messages")
-                            
-                            for i, doc in enumerate(documents):
-                                print(f"\n📄 Document {i+1}:")
-                                print(f"   Text length: {len(doc.text)} characters")
-                                print(f"   Metadata: {json.dumps(doc.metadata, indent=2)}")
-                                
-                                # Analyze the document content
-                                lines = doc.text.split('\n')
-                                non_empty_lines = [line.strip() for line in lines if line.strip()]
-                                print(f"   Non-empty lines: {len(non_empty_lines)}")
-                                print(f"   First few lines:")
-                                for j, line in enumerate(non_empty_lines[:5]):
-                                    print(f"     {j+1}: {line[:80]}...")
-                                    
-                        else:
-                            print(f"❌ Failed to get channel history: {history_response['error']}")
-                            
-                    except Exception as e:
-                        print(f"❌ Error checking channel: {e}")
+                    print(f"✅ SlackReader returned {len(documents)} documents from {len(messages)} messages")
+                    
+                    for i, doc in enumerate(documents):
+                        print(f"\n📄 Document {i+1}:")
+                        print(f"   Text length: {len(doc.text)} characters")
+                        print(f"   Metadata: {json.dumps(doc.metadata, indent=2)}")
                         
-            else:
-                print(f"❌ Failed to list channels: {channels_response['error']}")
-                
+                        # Analyze the document content
+                        non_empty_lines = [line.strip() for line in doc.text.split("\n") if line.strip()]
+                        print(f"   Non-empty lines: {len(non_empty_lines)}")
+                        print(f"   First few lines:")
+                        for j, line in enumerate(non_empty_lines[:5]):
+                            print(f"     {j+1}: {line[:80]}...")
+                            
+                except Exception as e:
+                    print(f"❌ Error checking channel: {e}")
+                    
         except Exception as e:
             print(f"❌ Error with channels: {e}")
             
@@ -3,12 +3,17 @@
 Debug script to test SlackReader with a channel where bot is a member
 """
 import os
+import re
 import json
+from collections import Counter
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Markers that usually start a new message inside a SlackReader document, counted in one pass
+MESSAGE_MARKERS = re.compile(r"User:|Timestamp:|---")
+
 def debug_member_channel():
     """Debug SlackReader with the all-zentinel channel where bot is a member"""
     print("🔍 Testing SlackReader with member channel...")
@@ -16,6 +21,7 @@ def debug_member_channel():
     try:
         from llama_index.readers.slack import SlackReader
         from slack_sdk import WebClient
+        from slack_history import fetch_channel_history
         
         slack_token = os.getenv("SLACK_BOT_TOKEN")
         if not slack_token:
@@ -35,88 +41,77 @@ def debug_member_channel():
         # Check messages first
         print(f"📨 Checking messages in #{test_channel_name}...")
         try:
-            history_response = client.conversations_history(
-                channel=test_channel_id,
-                limit=50  # Get more messages to see the pattern
-            )
-            if history_response["ok"]:
-                messages = history_response["messages"]
-                print(f"✅ Found {len(messages)} messages in channel")
+            messages = fetch_channel_history(client, test_channel_id, limit=50)  # Get more messages to see the pattern
+            print(f"✅ Found {len(messages)} messages in channel")
+            
+            # Analyze message types
+            message_types = {}
+            user_messages = 0
+            bot_messages = 0
+            
+            for i, msg in enumerate(messages):
+                text = msg.get("text", "")
+                user = msg.get("user", "unknown")
+                ts = msg.get("ts", "")
+                msg_type = msg.get("type", "message")
+                subtype = msg.get("subtype", "")
+                
+                # Count message types
+                key = f"{msg_type}:{subtype}" if subtype else msg_type
+                message_types[key] = message_types.get(key, 0) + 1
                 
-                # Analyze message types
-                message_types = {}
-                user_messages = 0
-                bot_messages = 0
+                if subtype == "bot_message":
+                    bot_messages += 1
+                elif msg_type == "message" and not subtype:
+                    user_messages += 1
                 
-                for i, msg in enumerate(messages):
-                    text = msg.get("text", "")
-                    user = msg.get("user", "unknown")
-                    ts = msg.get("ts", "")
-                    msg_type = msg.get("type", "message")
-                    subtype = msg.get("subtype", "")
-                    
-                    # Count message types
-                    key = f"{msg_type}:{subtype}" if subtype else msg_type
-                    message_types[key] = message_types.get(key, 0) + 1
-                    
-                    if subtype == "bot_message":
-                        bot_messages += 1
-                    elif msg_type == "message" and not subtype:
-                        user_messages += 1
-                    
-                    if i < 10:  # Show first 10 messages
-                        print(f"   Message {i+1}: Type={msg_type}, Subtype={subtype}")
-                        print(f"     User: {user}, TS: {ts}")
-                        print(f"     Text: {text[:100]}...")
-                        print()
+                if i < 10:  # Show first 10 messages
+                    print(f"   Message {i+1}: Type={msg_type}, Subtype={subtype}")
+                    print(f"     User: {user}, TS: {ts}")
+                    print(f"     Text: {text[:100]}...")
+                    print()
+            
+            print(f"\n📊 Message Analysis:")
+            print(f"   Total messages: {len(messages)}")
+            print(f"   User messages: {user_messages}")
+            print(f"   Bot messages: {bot_messages}")
+            print(f"   Message types: {json.dumps(message_types, indent=2)}")
+            
+            # Now test SlackReader, the reader /api/sync/slack uses
+            print(f"\n🤖 Testing SlackReader with {len(messages)} messages...")
+            reader = SlackReader(slack_token=slack_token)
+            documents = reader.load_data(channel_ids=[test_channel_id])
+            
+            print(f"✅ SlackReader returned {len(documents)} documents from {len(messages)} messages")
+            print(f"📈 Conversion ratio: {len(messages)} messages → {len(documents)} documents")
+            
+            for i, doc in enumerate(documents):
+                print(f"\n📄 Document {i+1}:")
+                print(f"   Text length: {len(doc.text)} characters")
+                print(f"   Metadata keys: {list(doc.metadata.keys())}")
                 
-                print(f"\n📊 Message Analysis:")
-                print(f"   Total messages: {len(messages)}")
-                print(f"   User messages: {user_messages}")
-                print(f"   Bot messages: {bot_messages}")
-                print(f"   Message types: {json.dumps(message_types, indent=2)}")
+                # Show metadata details
+                for key, value in doc.metadata.items():
+                    if isinstance(value, str) and len(value) > 100:
+                        print(f"   {key}: {value[:100]}...")
+                    else:
+                        print(f"   {key}: {value}")
                 
-                # Now test SlackReader
-                print(f"\n🤖 Testing SlackReader with {len(messages)} messages...")
-                reader = SlackReader(slack_token=slack_token)
-                documents = reader.load_data(channel_ids=[test_channel_id])
+                # Analyze document content structure
+                total_lines = doc.text.count("\n") + 1
+                non_empty_lines = sum(1 for line in doc.text.split("\n") if line.strip())
+                print(f"   Total lines: {total_lines}")
+                print(f"   Non-empty lines: {non_empty_lines}")
                 
-                print(f"✅ SlackReader returned {len(documents)} documents from {len(messages)} messages")
-                print(f"📈 Conversion ratio: {len(messages)} messages → {len(documents)} documents")
+                # Look for patterns that indicate multiple messages
+                counts = Counter(match.group() for match in MESSAGE_MARKERS.finditer(doc.text))
+                print(f"   Potential message indicators:")
+                print(f"     User mentions: {counts['User:']}")
+                print(f"     Timestamps: {counts['Timestamp:']}")
+                print(f"     Separators: {counts['---']}")
                 
-                for i, doc in enumerate(documents):
-                    print(f"\n📄 Document {i+1}:")
-                    print(f"   Text length: {len(doc.text)} characters")
-                    print(f"   Metadata keys: {list(doc.metadata.keys())}")
-                    
-                    # Show metadata details
-                    for key, value in doc.metadata.items():
-                        if isinstance(value, str) and len(value) > 100:
-                            print(f"   {key}: {value[:100]}...")
-                        else:
-                            print(f"   {key}: {value}")
-                    
-                    # Analyze document content structure
-                    lines = doc.text.split('\n')
-                    non_empty_lines = [line.strip() for line in lines if line.strip()]
-                    print(f"   Total lines: {len(lines)}")
-                    print(f"   Non-empty lines: {len(non_empty_lines)}")
-                    
-                    # Look for patterns that indicate multiple messages
-                    user_mentions = doc.text.count("User:")
-                    timestamps = doc.text.count("Timestamp:")
-                    message_separators = doc.text.count("---")
-                    
-                    print(f"   Potential message indicators:")
-                    print(f"     User mentions: {user_mentions}")
-                    print(f"     Timestamps: {timestamps}")
-                    print(f"     Separators: {message_separators}")
-                    
-                    print(f"   First 500 characters:")
-                    print(f"   {doc.text[:500]}...")
-                    
-            else:
-                print(f"❌ Failed to get channel history: {history_response['error']}")
+                print(f"   First 500 characters:")
+                print(f"   {doc.text[:500]}...")
                 
         except Exception as e:
             print(f"❌ Error checking channel: {e}")
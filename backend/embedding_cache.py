@@ -0,0 +1,142 @@
+"""
+Persistent embedding cache for Synapse Knowledge Base
+
+This module provides a content-addressed, SQLite-backed cache for embedding
+vectors so unchanged text is never sent to the embedding API twice.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable
+
+import numpy as np
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Stay below SQLite's default limit on bound parameters per statement
+_MAX_QUERY_PARAMS = 900
+
+# Bump when the stored vector format changes so stale entries are never decoded
+CACHE_FORMAT_VERSION = 1
+
+# Supported storage precisions: float32 (exact), float16 (2x smaller, near-lossless for
+# unit-norm embeddings) or int8 with a per-vector scale (4x smaller)
+PRECISIONS = ("fp32", "fp16", "int8")
+
+
+def quantize(vector: np.ndarray) -> bytes:
+    """Encode a vector as a float32 scale followed by symmetric int8 components."""
+    vector = np.asarray(vector, dtype=np.float32)
+    scale = float(np.max(np.abs(vector))) / 127.0 if vector.size else 0.0
+    if scale == 0.0:
+        scale = 1.0
+    quantized = np.round(vector / scale).astype(np.int8)
+    return np.float32(scale).tobytes() + quantized.tobytes()
+
+
+def dequantize(blob: bytes) -> np.ndarray:
+    """Decode a vector produced by quantize back to float32."""
+    scale = np.frombuffer(blob, dtype=np.float32, count=1)[0]
+    return np.frombuffer(blob, dtype=np.int8, offset=4).astype(np.float32) * scale
+
+
+class EmbeddingCache:
+    """SQLite-backed cache mapping sha256(format + model + text) to an embedding vector."""
+
+    def __init__(self, path: str, precision: str = "fp32"):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Path of the SQLite file used to persist cached embeddings
+            precision: "fp32" to store exact vectors, "fp16" for half precision, or "int8" to store them quantized
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported embedding cache precision: {precision}")
+        self.precision = precision
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # The connection is shared between the event loop and worker threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+        logger.info(f"Embedding cache ready at: {self.path}")
+
+    def make_key(self, model: str, text: str) -> str:
+        """Build the cache key for a text embedded with the given model."""
+        prefix = f"v{CACHE_FORMAT_VERSION}:{self.precision}"
+        return hashlib.sha256(f"{prefix}\0{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            keys: Cache keys built with make_key
+
+        Returns:
+            Dictionary mapping each cached key to its float32 embedding; misses are omitted
+        """
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(keys), _MAX_QUERY_PARAMS):
+                chunk = keys[i:i + _MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = self._decode(blob)
+        return found
+
+    def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        """
+        Store embeddings in the cache's precision.
+
+        Args:
+            items: Dictionary mapping cache keys to embedding vectors
+        """
+        if not items:
+            return
+        rows = [(key, self._encode(vector)) for key, vector in items.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+
+    def _encode(self, vector: np.ndarray) -> bytes:
+        """Serialize a vector in the cache's precision."""
+        if self.precision == "int8":
+            return quantize(vector)
+        if self.precision == "fp16":
+            return np.asarray(vector, dtype=np.float16).tobytes()
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    def _decode(self, blob: bytes) -> np.ndarray:
+        """Deserialize a vector stored by _encode."""
+        if self.precision == "int8":
+            return dequantize(blob)
+        if self.precision == "fp16":
+            return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+        return np.frombuffer(blob, dtype=np.float32)
+
+
+# Global instance for the application
+embedding_cache = EmbeddingCache(
+    settings.EMBEDDING_CACHE_PATH,
+    precision=settings.EMBEDDING_CACHE_PRECISION
+)
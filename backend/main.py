@@ -1,27 +1,37 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
-from pydantic import BaseModel, ValidationError, Field
-from typing import List, Dict, Any, Optional
-import tempfile
-import os
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import hashlib
 import logging
-import shutil
-import json
+import orjson
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from functools import lru_cache
 import uvicorn
 from pathlib import Path
+from openai import AsyncOpenAI, APIError, APIConnectionError, RateLimitError
+from chromadb.errors import ChromaError
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException
+from streaming_form_data.targets import FileTarget, ValueTarget
 
 # Import settings and vector store
 from settings import settings
-from vector_store_client import VectorStoreClient
+from vector_store_client import get_vector_store_client
+from custom_openai_embedding import CustomOpenAIEmbedding, async_http_client, http_client
+from semantic_cache import exact_query_cache, invalidate_query_caches, semantic_query_cache
 
 # LlamaIndex imports
-from llama_index.core import VectorStoreIndex, StorageContext, Settings, SimpleDirectoryReader
-from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core import VectorStoreIndex, Settings, SimpleDirectoryReader
+from llama_index.core.ingestion import run_transformations
+from llama_index.core.node_parser import TokenTextSplitter
 from llama_index.core.vector_stores import MetadataFilters, MetadataFilter
-from llama_index.vector_stores.chroma import ChromaVectorStore
-from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.llms.openai import OpenAI as LlamaOpenAI
 from llama_index.readers.github import GithubRepositoryReader, GithubClient
 from llama_index.readers.slack import SlackReader
@@ -30,8 +40,39 @@ from llama_index.readers.slack import SlackReader
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize FastAPI app
-app = FastAPI(title="Synapse Backend API", version="1.0.0")
+def warm_up() -> None:
+    """
+    Touch the hot paths of the first query and upload so they don't pay cold-start costs.
+
+    Building the index imports LlamaIndex's retrieval and synthesis modules, and the vector
+    store loads its HNSW index and opens the pooled HTTP/2 connection to the OpenAI API.
+    """
+    try:
+        get_index().as_query_engine()
+        Settings.node_parser  # instantiated lazily on first access
+        vector_store.warm_up()
+        document_count = vector_store.collection.count()
+        logger.info(f"Warmup complete ({document_count} chunks in collection)")
+    except Exception as e:
+        # A failed warmup only costs latency; the first request retries these steps
+        logger.warning(f"Warmup failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up on startup and release the pooled OpenAI connections on shutdown."""
+    if settings.WARMUP_ON_STARTUP:
+        await asyncio.to_thread(warm_up)
+    yield
+    await async_http_client.aclose()
+    http_client.close()
+
+# Initialize FastAPI app; responses are serialized with orjson instead of the stdlib json module
+app = FastAPI(
+    title="Synapse Backend API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -42,28 +83,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses, such as query answers carrying many source nodes
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# User-friendly messages for common Pydantic validation error types
+VALIDATION_ERROR_MESSAGES = {
+    'missing': "{field} is required",
+    'string_too_short': "{field} cannot be empty",
+    'value_error': "{field} has an invalid value",
+}
+
+def format_validation_error(error: Dict[str, Any]) -> str:
+    """Turn one Pydantic validation error into a user-friendly message."""
+    field = error.get('loc', ('unknown',))[-1]  # Get the field name
+    template = VALIDATION_ERROR_MESSAGES.get(error.get('type', 'validation_error'))
+    if template:
+        return template.format(field=field)
+    return f"{field}: {error.get('msg', 'validation error')}"
+
 # Custom exception handler for validation errors
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
     """Handle Pydantic validation errors with user-friendly messages."""
-    errors = []
-    for error in exc.errors():
-        field = error.get('loc', ['unknown'])[-1]  # Get the field name
-        error_type = error.get('type', 'validation_error')
-        
-        if error_type == 'missing':
-            errors.append(f"{field} is required")
-        elif error_type == 'string_too_short':
-            errors.append(f"{field} cannot be empty")
-        elif error_type == 'value_error':
-            errors.append(f"{field} has an invalid value")
-        else:
-            errors.append(f"{field}: {error.get('msg', 'validation error')}")
+    errors = [format_validation_error(error) for error in exc.errors()]
     
     error_message = "; ".join(errors) if errors else "Invalid request data"
     logger.error(f"Validation error: {error_message}")
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={"detail": error_message}
     )
@@ -71,18 +118,17 @@ async def validation_exception_handler(request, exc):
 # Create directories
 DATA_DIR = Path("./data")
 STORAGE_DIR = Path("./storage")
-TEMP_UPLOADS_DIR = Path("./temp_uploads")
 DATA_DIR.mkdir(exist_ok=True)
 STORAGE_DIR.mkdir(exist_ok=True)
-TEMP_UPLOADS_DIR.mkdir(exist_ok=True)
 
-# Initialize OpenAI client (optional for testing)
+# Initialize async OpenAI client (optional for testing)
 client = None
 try:
     if settings.OPENAI_API_KEY:
-        client = OpenAI(
+        client = AsyncOpenAI(
             api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_BASE_URL
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=async_http_client
         )
     else:
         logger.warning("OpenAI API key not found. Some features may not work.")
@@ -90,7 +136,122 @@ except Exception as e:
     logger.warning(f"Failed to initialize OpenAI client: {e}")
 
 # Initialize vector store client
-vector_store = VectorStoreClient()
+vector_store = get_vector_store_client()
+
+# Configure LlamaIndex once at startup instead of rebuilding the models on every request
+Settings.embed_model = CustomOpenAIEmbedding(model="text-embedding-3-small")
+Settings.llm = LlamaOpenAI(
+    model="gpt-4o-mini",
+    api_key=settings.OPENAI_API_KEY,
+    api_base=settings.OPENAI_BASE_URL,
+    http_client=http_client,
+    async_http_client=async_http_client
+)
+
+# Index over the shared Chroma collection, built on first use and reused by every request
+_index: Optional[VectorStoreIndex] = None
+_index_lock = threading.Lock()
+
+def get_index() -> VectorStoreIndex:
+    """Return the shared index over the Chroma collection, creating it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            # Re-check under the lock so concurrent first requests build it only once
+            if _index is None:
+                _index = VectorStoreIndex.from_vector_store(vector_store.get_vector_store())
+    return _index
+
+@lru_cache(maxsize=256)
+def get_query_engine(context_id: str, streaming: bool = False):
+    """
+    Return a query engine restricted to one context, built once per contextId.
+
+    The engine's retriever queries Chroma on every call, so cached engines see newly
+    inserted documents without being rebuilt. Streaming engines return the answer
+    as a token generator instead of waiting for the full completion.
+    """
+    filters = MetadataFilters(
+        filters=[
+            MetadataFilter(key="contextId", value=context_id)
+        ]
+    )
+    return get_index().as_query_engine(filters=filters, streaming=streaming)
+
+# Metadata key holding a hash of a chunk's contextId and text, used to skip unchanged chunks
+CONTENT_HASH_KEY = "content_hash"
+
+# Maximum number of hashes looked up in Chroma with one $in filter
+HASH_LOOKUP_BATCH = 500
+
+def content_hash(node) -> str:
+    """Hash a chunk's text together with its contextId, so the same text in another context is still stored."""
+    data = f"{node.metadata.get('contextId')}\0{node.get_content()}"
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+def existing_content_hashes(hashes: List[str]) -> set:
+    """Return the subset of hashes already stored in the collection."""
+    found = set()
+    for i in range(0, len(hashes), HASH_LOOKUP_BATCH):
+        result = vector_store.collection.get(
+            where={CONTENT_HASH_KEY: {"$in": hashes[i:i + HASH_LOOKUP_BATCH]}},
+            include=["metadatas"]
+        )
+        found.update(metadata[CONTENT_HASH_KEY] for metadata in result["metadatas"])
+    return found
+
+# Source code and data files already have natural line boundaries, so they are split on
+# newlines instead of running the sentence splitter's boundary detection over them
+CODE_EXTENSIONS = {'.py', '.ts', '.js', '.json', '.yml', '.yaml'}
+CODE_SPLITTER = TokenTextSplitter(chunk_size=Settings.chunk_size, chunk_overlap=50, separator="\n")
+
+def split_documents(documents) -> list:
+    """Chunk prose with the default transformations and code or data files line by line."""
+    prose, code = [], []
+    for doc in documents:
+        path = doc.metadata.get("file_path") or doc.metadata.get("file_name") or ""
+        (code if Path(path).suffix.lower() in CODE_EXTENSIONS else prose).append(doc)
+    
+    nodes = run_transformations(prose, Settings.transformations) if prose else []
+    if code:
+        nodes.extend(CODE_SPLITTER.get_nodes_from_documents(code))
+    return nodes
+
+def insert_documents(documents) -> int:
+    """
+    Insert documents into the existing Chroma-backed index.
+
+    All documents are chunked first and their nodes inserted in one call, so chunk
+    embeddings are requested in large batches instead of once per document. Chunks
+    already stored for the same context are skipped and never re-embedded.
+
+    Returns:
+        Number of chunks inserted
+    """
+    nodes = split_documents(documents)
+    
+    unique_nodes = {}
+    for node in nodes:
+        node_hash = content_hash(node)
+        node.metadata[CONTENT_HASH_KEY] = node_hash
+        # Bookkeeping only: keep the hash out of the embedded and LLM-visible text
+        # (nodes split from one document may share these lists)
+        for excluded_keys in (node.excluded_embed_metadata_keys, node.excluded_llm_metadata_keys):
+            if CONTENT_HASH_KEY not in excluded_keys:
+                excluded_keys.append(CONTENT_HASH_KEY)
+        unique_nodes.setdefault(node_hash, node)
+    
+    existing = existing_content_hashes(list(unique_nodes))
+    nodes = [node for node_hash, node in unique_nodes.items() if node_hash not in existing]
+    logger.info(f"Inserting {len(nodes)} new chunks, skipping {len(unique_nodes) - len(nodes)} already stored")
+    if not nodes:
+        return 0
+    
+    # Length-sort across the whole insert so every embedding batch holds similar-sized chunks;
+    # nodes keep their ids and source relationships, so retrieval does not depend on this order
+    nodes.sort(key=lambda node: len(node.get_content()))
+    get_index().insert_nodes(nodes)
+    return len(nodes)
 
 # Pydantic models
 class QueryRequest(BaseModel):
@@ -113,6 +274,22 @@ class GitHubRepoRequest(BaseModel):
     branch: str = Field(default="main", min_length=1, description="Branch name")
     contextId: str = Field(..., min_length=1, description="Context identifier")
 
+# Maximum repositories per batch sync request
+MAX_GITHUB_BATCH = 10
+
+class GitHubBatchSyncRequest(BaseModel):
+    repos: List[GitHubRepoRequest] = Field(..., min_length=1, max_length=MAX_GITHUB_BATCH, description="Repositories to sync")
+
+class GitHubRepoSyncStatus(BaseModel):
+    owner: str
+    repo: str
+    contextId: str
+    success: bool
+    message: str
+
+class GitHubBatchSyncResponse(BaseModel):
+    results: List[GitHubRepoSyncStatus]
+
 class SlackSyncRequest(BaseModel):
     channel_ids: List[str]
     contextId: str
@@ -125,41 +302,158 @@ class TransformRequest(BaseModel):
 class TransformResponse(BaseModel):
     transformed_question: str
 
+# Maximum questions per batch transform; all rewrites share one completion's token budget
+MAX_TRANSFORM_BATCH = 20
+
+class TransformBatchRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=MAX_TRANSFORM_BATCH, description="Questions to transform")
+
+class StatusResponse(BaseModel):
+    contextId: str
+    indexed: bool
+
 # API Endpoints
 @app.get("/")
 async def root():
     return {"message": "Synapse API is running", "version": "1.0.0"}
 
-@app.post("/api/upload", response_model=UploadResponse)
-async def upload_document(file: UploadFile = File(...), contextId: str = Form(...)):
-    """Upload and process a document using LlamaIndex."""
-    temp_file_path = None
+@app.get("/api/status/{context_id}", response_model=StatusResponse)
+async def context_status(context_id: str):
+    """Report whether any chunks are indexed for a context, without running a query."""
+    try:
+        result = await asyncio.to_thread(
+            vector_store.collection.get,
+            where={"contextId": context_id},
+            limit=1,
+            include=[]
+        )
+    except ChromaError as e:
+        logger.error(f"Vector database error while checking status: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=503,
+            detail="Vector database is temporarily unavailable. Please try again later."
+        )
+    return StatusResponse(contextId=context_id, indexed=bool(result["ids"]))
+
+# Request body schema for the streamed upload endpoint, which parses its form manually
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["file", "contextId"],
+                "properties": {
+                    "file": {"type": "string", "format": "binary"},
+                    "contextId": {"type": "string"},
+                    "content_hash": {
+                        "type": "string",
+                        "description": "Optional sha256 hex digest of the file, verified by the server"
+                    }
+                }
+            }
+        }
+    }
+}
+
+# Metadata key holding the sha256 of an uploaded file, used to skip re-processing identical uploads
+UPLOAD_HASH_KEY = "upload_hash"
+
+class HashingFileTarget(FileTarget):
+    """FileTarget that also computes the sha256 of the bytes it writes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    async def on_data_received_async(self, chunk: bytes):
+        self.digest.update(chunk)
+        await super().on_data_received_async(chunk)
+
+def upload_already_indexed(context_id: str, upload_hash: str) -> bool:
+    """Return whether chunks of an identical upload are already stored for the context."""
+    result = vector_store.collection.get(
+        where={"$and": [{"contextId": context_id}, {UPLOAD_HASH_KEY: upload_hash}]},
+        limit=1,
+        include=[]
+    )
+    return bool(result["ids"])
+
+async def receive_upload(request: Request) -> Tuple[str, str, Path, str]:
+    """
+    Stream a multipart upload straight into DATA_DIR.
+
+    The body is parsed as it arrives and the file part written to its final
+    directory, instead of being spooled to a temporary file by UploadFile first.
+    The file is hashed on the way through; a content_hash supplied by the client
+    must match it.
+
+    Returns:
+        The uploaded filename, the contextId form field, the path the file was saved to,
+        and the sha256 hex digest of the file
+    """
+    try:
+        parser = StreamingFormDataParser(headers=request.headers)
+    except ParseFailedException as e:
+        # Not multipart/form-data at all, or no boundary to split the parts on
+        raise HTTPException(status_code=422, detail=f"Expected a multipart/form-data upload: {e}")
+    
+    context_target = ValueTarget()
+    hash_target = ValueTarget()
+    partial_path = DATA_DIR / f".upload-{uuid.uuid4().hex}"
+    file_target = HashingFileTarget(str(partial_path))
+    parser.register("contextId", context_target)
+    parser.register("content_hash", hash_target)
+    parser.register("file", file_target)
     
     try:
-        logger.info(f"Starting upload process for file: {file.filename}, contextId: {contextId}")
-        
-        # Validate file
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="No file provided")
-        
-        # Save uploaded file to temporary location
-        temp_file_path = TEMP_UPLOADS_DIR / file.filename
-        logger.info(f"Saving file to temporary location: {temp_file_path}")
-        
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Also save to data directory for persistence
-        file_path = DATA_DIR / file.filename
-        logger.info(f"Saving file to data directory: {file_path}")
+        # The async parser writes the file part through aiofiles, off the event loop
+        async for chunk in request.stream():
+            await parser.adata_received(chunk)
+    except Exception as e:
+        await file_target.on_finish_async()
+        partial_path.unlink(missing_ok=True)
+        logger.error(f"Failed to parse upload: {e}", exc_info=True)
+        raise HTTPException(status_code=400, detail="Malformed multipart upload")
+    
+    # Never let the client-supplied name escape the data directory
+    filename = Path(file_target.multipart_filename or "").name
+    if not filename:
+        partial_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="No file provided")
+    
+    context_id = context_target.value.decode("utf-8").strip()
+    if not context_id:
+        partial_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=422, detail="contextId is required")
+    
+    upload_hash = file_target.digest.hexdigest()
+    claimed_hash = hash_target.value.decode("utf-8").strip().lower()
+    if claimed_hash and claimed_hash != upload_hash:
+        partial_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="content_hash does not match the uploaded file")
+    
+    # Renaming within the directory moves no data
+    file_path = DATA_DIR / filename
+    partial_path.replace(file_path)
+    return filename, context_id, file_path, upload_hash
+
+@app.post("/api/upload", response_model=UploadResponse, openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
+async def upload_document(request: Request):
+    """Upload and process a document using LlamaIndex."""
+    try:
+        # Save uploaded file once, to the data directory for persistence, as it streams in
+        filename, contextId, file_path, upload_hash = await receive_upload(request)
+        logger.info(f"Saved upload {filename} for contextId {contextId} to data directory: {file_path}")
         
-        with open(file_path, "wb") as buffer:
-            file.file.seek(0)  # Reset file pointer
-            shutil.copyfileobj(file.file, buffer)
+        # Identical content was already uploaded to this context: skip reading, chunking and embedding
+        if await asyncio.to_thread(upload_already_indexed, contextId, upload_hash):
+            logger.info(f"Upload {filename} is unchanged for context {contextId}, skipping processing")
+            return UploadResponse(message=f"Successfully uploaded {filename} (content already indexed)")
         
-        # Load the document using LlamaIndex SimpleDirectoryReader
-        logger.info(f"Loading document with SimpleDirectoryReader: {temp_file_path}")
-        documents = SimpleDirectoryReader(input_files=[str(temp_file_path)]).load_data()
+        # Load the document using LlamaIndex SimpleDirectoryReader, off the event loop
+        logger.info(f"Loading document with SimpleDirectoryReader: {file_path}")
+        documents = await asyncio.to_thread(SimpleDirectoryReader(input_files=[str(file_path)]).load_data)
         
         if not documents:
             raise HTTPException(status_code=400, detail="Failed to load document content")
@@ -169,77 +463,65 @@ async def upload_document(file: UploadFile = File(...), contextId: str = Form(..
         for doc in documents:
             doc.metadata.update({
                 "source": "file_upload",
-                "filename": file.filename,
-                "contextId": contextId
+                "filename": filename,
+                "contextId": contextId,
+                UPLOAD_HASH_KEY: upload_hash
             })
+            # Bookkeeping only: keep the hash out of the embedded and LLM-visible text
+            doc.excluded_embed_metadata_keys.append(UPLOAD_HASH_KEY)
+            doc.excluded_llm_metadata_keys.append(UPLOAD_HASH_KEY)
         
-        # Create the index using LlamaIndex - this handles chunking, embedding, and storage automatically
-        logger.info("Creating vector index from documents")
-        index = VectorStoreIndex.from_documents(
-            documents,
-            storage_context=vector_store.get_storage_context()
-        )
+        # Insert into the shared index - this handles chunking, batched embedding, and storage.
+        # It runs in a worker thread so other requests are served while chunks are embedded.
+        logger.info("Inserting documents into the vector index")
+        await asyncio.to_thread(insert_documents, documents)
         
-        # Clean up the temporary file
-        if temp_file_path and temp_file_path.exists():
-            temp_file_path.unlink()
-            logger.info(f"Cleaned up temporary file: {temp_file_path}")
+        invalidate_query_caches(contextId)
         
-        logger.info(f"Successfully processed {file.filename} using LlamaIndex for context: {contextId}")
-        return UploadResponse(message=f"Successfully uploaded and processed {file.filename}")
+        logger.info(f"Successfully processed {filename} using LlamaIndex for context: {contextId}")
+        return UploadResponse(message=f"Successfully uploaded and processed {filename}")
         
     except HTTPException:
         # Re-raise HTTP exceptions (validation errors)
         raise
     except FileNotFoundError as e:
         logger.error(f"File not found error during upload: {e}", exc_info=True)
-        if temp_file_path and temp_file_path.exists():
-            temp_file_path.unlink()
         raise HTTPException(
             status_code=400, 
             detail=f"File processing failed: {str(e)}"
         )
     except PermissionError as e:
         logger.error(f"Permission error during file upload: {e}", exc_info=True)
-        if temp_file_path and temp_file_path.exists():
-            temp_file_path.unlink()
         raise HTTPException(
             status_code=500, 
             detail="File system permission error. Please try again or contact support."
         )
+    except RateLimitError as e:
+        logger.error(f"OpenAI rate limit exceeded during upload: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=429,
+            detail="AI service rate limit exceeded. Please try again in a few moments."
+        )
+    except (APIError, APIConnectionError) as e:
+        # Embedding requests go to the OpenAI API
+        logger.error(f"OpenAI API error during upload: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=503, 
+            detail="Document embedding service is temporarily unavailable. Please try again later."
+        )
+    except ChromaError as e:
+        logger.error(f"Vector database error during upload: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=503, 
+            detail="Vector database is temporarily unavailable. Please try again later."
+        )
     except Exception as e:
-        # Clean up temporary file if it exists
-        if temp_file_path and temp_file_path.exists():
-            temp_file_path.unlink()
-            logger.info(f"Cleaned up temporary file after error: {temp_file_path}")
-        
         # Log the full error with traceback for debugging
         logger.error(f"Unexpected error during file upload: {e}", exc_info=True)
-        
-        # Check for specific error types and provide user-friendly messages
-        error_message = str(e)
-        if "OpenAI" in error_message or "API" in error_message:
-            raise HTTPException(
-                status_code=503, 
-                detail="External AI service is temporarily unavailable. Please try again later."
-            )
-        elif "ChromaDB" in error_message or "vector" in error_message.lower():
-            raise HTTPException(
-                status_code=503, 
-                detail="Vector database is temporarily unavailable. Please try again later."
-            )
-        elif "embedding" in error_message.lower():
-            raise HTTPException(
-                status_code=503, 
-                detail="Document embedding service is temporarily unavailable. Please try again later."
-            )
-        else:
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Failed to process file upload. Error: {error_message}"
-            )
-
-
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Failed to process file upload. Error: {str(e)}"
+        )
 
 @app.post("/api/sync/slack")
 async def sync_slack(
@@ -249,18 +531,6 @@ async def sync_slack(
 ):
     """Sync data from Slack channels using LlamaIndex SlackReader."""
     try:
-        import asyncio
-        
-        # Configure LlamaIndex settings for OpenAI using custom embedding
-        from custom_openai_embedding import CustomOpenAIEmbedding
-        
-        Settings.embed_model = CustomOpenAIEmbedding(model="text-embedding-3-small")
-        Settings.llm = LlamaOpenAI(
-            model="gpt-4o-mini", 
-            api_key=settings.OPENAI_API_KEY,
-            api_base=settings.OPENAI_BASE_URL
-        )
-        
         # Parse comma-separated channel IDs
         if not channel_ids or not channel_ids.strip():
             raise HTTPException(
@@ -283,59 +553,62 @@ async def sync_slack(
         if not slack_token:
             raise HTTPException(status_code=422, detail="Slack token is required for syncing")
         
-        # Function to run Slack sync in a separate thread
-        def sync_slack_channels():
-            try:
-                logger.info(f"Starting Slack sync for channels: {channel_list}")
-                
-                # Initialize Slack reader
-                reader = SlackReader(slack_token=slack_token)
-                logger.info("SlackReader initialized successfully")
-                
-                # Load data from specified channels
-                load_kwargs = {"channel_ids": channel_list}
-                logger.info(f"Calling SlackReader.load_data with parameters: {load_kwargs}")
-                
-                # This is the critical call where silent failures often occur
-                slack_documents = reader.load_data(**load_kwargs)
-                
-                # Add this new log line to track what SlackReader actually returned
-                logger.info(f"SlackReader returned {len(slack_documents)} documents.")
-                
-                # Check for empty results and provide detailed warning
-                if not slack_documents:
-                    logger.warning("No documents were returned from SlackReader. This could indicate:")
-                    logger.warning("1. Bot is not a member of the specified channel(s)")
-                    logger.warning("2. Missing required Slack scopes (channels:history, groups:history, etc.)")
-                    logger.warning("3. Channel ID(s) are invalid or channel is empty")
-                    logger.warning("4. Bot token lacks proper permissions")
-                    return []
-                
-                # Log details about the documents retrieved
-                logger.info(f"Successfully retrieved {len(slack_documents)} documents from Slack")
-                for i, doc in enumerate(slack_documents[:3]):  # Log first 3 documents for debugging
-                    logger.info(f"Document {i+1}: {len(doc.text)} characters, metadata keys: {list(doc.metadata.keys())}")
-                
-                # Add custom metadata tags for easy filtering later
-                # Convert channel_list to JSON string to avoid ChromaDB metadata type errors
-                channels_json_string = json.dumps(channel_list)
-                
-                for doc in slack_documents:
-                    doc.metadata.update({
-                        "source": "slack",
-                        "synced_from_channels": channels_json_string,
-                        "contextId": contextId
-                    })
-                
-                logger.info(f"Added metadata to {len(slack_documents)} documents")
-                return slack_documents
-                
-            except Exception as e:
-                logger.error(f"Error in sync_slack_channels: {e}", exc_info=True)
-                raise
+        logger.info(f"Starting Slack sync for channels: {channel_list}")
         
-        # Run the sync operation in a separate thread to avoid event loop conflicts
-        slack_documents = await asyncio.to_thread(sync_slack_channels)
+        # Initialize Slack reader
+        reader = SlackReader(slack_token=slack_token)
+        logger.info("SlackReader initialized successfully")
+        
+        # Load each channel in its own worker thread so channels are fetched in parallel
+        # and the blocking Slack calls stay off the event loop
+        results = await asyncio.gather(
+            *(asyncio.to_thread(reader.load_data, channel_ids=[channel_id]) for channel_id in channel_list),
+            return_exceptions=True
+        )
+        
+        slack_documents = []
+        errors = []
+        failed_channels = []
+        for channel_id, result in zip(channel_list, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error loading Slack channel {channel_id}: {result}", exc_info=result)
+                errors.append(result)
+                failed_channels.append({"channel": channel_id, "error": str(result)})
+            else:
+                slack_documents.extend(result)
+        
+        # Fail the sync only if no channel could be read; partial failures are reported in the response
+        if errors and len(errors) == len(channel_list):
+            raise errors[0]
+        
+        # Add this new log line to track what SlackReader actually returned
+        logger.info(f"SlackReader returned {len(slack_documents)} documents.")
+        
+        # Check for empty results and provide detailed warning
+        if not slack_documents:
+            logger.warning("No documents were returned from SlackReader. This could indicate:")
+            logger.warning("1. Bot is not a member of the specified channel(s)")
+            logger.warning("2. Missing required Slack scopes (channels:history, groups:history, etc.)")
+            logger.warning("3. Channel ID(s) are invalid or channel is empty")
+            logger.warning("4. Bot token lacks proper permissions")
+        else:
+            # Log details about the documents retrieved
+            logger.info(f"Successfully retrieved {len(slack_documents)} documents from Slack")
+            for i, doc in enumerate(slack_documents[:3]):  # Log first 3 documents for debugging
+                logger.info(f"Document {i+1}: {len(doc.text)} characters, metadata keys: {list(doc.metadata.keys())}")
+            
+            # Add custom metadata tags for easy filtering later
+            # Convert channel_list to JSON string to avoid ChromaDB metadata type errors
+            # Build the shared tags once; update() copies them into each document's metadata
+            slack_metadata = {
+                "source": "slack",
+                "synced_from_channels": orjson.dumps(channel_list).decode(),
+                "contextId": contextId
+            }
+            for doc in slack_documents:
+                doc.metadata.update(slack_metadata)
+            
+            logger.info(f"Added metadata to {len(slack_documents)} documents")
         
         # Check if we got any documents and provide appropriate response
         if not slack_documents:
@@ -346,6 +619,7 @@ async def sync_slack(
                 "syncedCount": 0,
                 "document_count": 0,
                 "channels": channel_list,
+                "failed_channels": failed_channels,
                 "suggestions": [
                     "Verify bot is a member of the channel (use /who command in Slack)",
                     "Check bot token scopes include channels:history, groups:history, etc.",
@@ -355,24 +629,31 @@ async def sync_slack(
         
         logger.info(f"Processing {len(slack_documents)} documents for vector store insertion")
         
-        # Create ChromaVectorStore from existing collection
-        chroma_vector_store = ChromaVectorStore(chroma_collection=vector_store.collection)
-        
-        # Load the existing index from the vector store
-        index = VectorStoreIndex.from_vector_store(chroma_vector_store)
-        
-        # Insert the new Slack documents into the existing index
-        for doc in slack_documents:
-            index.insert(doc)
+        # Insert the new Slack documents into the existing index, embedding their chunks in batches
+        await asyncio.to_thread(insert_documents, slack_documents)
+        invalidate_query_caches(contextId)
         
         logger.info(f"Successfully inserted {len(slack_documents)} documents into vector store")
         
+        if failed_channels:
+            failed_ids = {failure["channel"] for failure in failed_channels}
+            synced_channels = [ch for ch in channel_list if ch not in failed_ids]
+            return {
+                "status": "warning",
+                "message": f"Synced {len(slack_documents)} documents from Slack channels: {', '.join(synced_channels)}; {len(failed_channels)} channel(s) failed",
+                "syncedCount": len(slack_documents),
+                "document_count": len(slack_documents),
+                "channels": channel_list,
+                "failed_channels": failed_channels
+            }
+        
         return {
             "status": "success",
             "message": f"Successfully synced {len(slack_documents)} documents from Slack channels: {', '.join(channel_list)}",
             "syncedCount": len(slack_documents),
             "document_count": len(slack_documents),
-            "channels": channel_list
+            "channels": channel_list,
+            "failed_channels": failed_channels
         }
         
     except HTTPException:
@@ -382,12 +663,41 @@ async def sync_slack(
         logger.error(f"Error syncing Slack: {e}")
         raise HTTPException(status_code=500, detail=f"Slack sync failed: {str(e)}")
 
+def load_github_documents(repo_details: GitHubRepoRequest, github_token: str) -> list:
+    """Load a repository's files with GithubRepositoryReader and tag them with the repo and contextId."""
+    # Initialize GitHub client and reader
+    github_client = GithubClient(github_token=github_token, verbose=True)
+    reader = GithubRepositoryReader(
+        github_client=github_client,
+        owner=repo_details.owner,
+        repo=repo_details.repo,
+        # Filter to include only relevant file types
+        filter_file_extensions=(['.py', '.ts', '.js', '.md', '.txt', '.json', '.yml', '.yaml'], GithubRepositoryReader.FilterType.INCLUDE),
+        # Set verbose=True to fetch issues and PRs as well
+        verbose=True,
+        concurrent_requests=settings.GITHUB_CONCURRENT_REQUESTS,
+    )
+    
+    # Load the data from the repository
+    github_documents = reader.load_data(branch=repo_details.branch)
+    
+    # Add custom metadata tags for easy filtering later
+    github_metadata = {
+        "source": "github",
+        "owner": repo_details.owner,
+        "repo": repo_details.repo,
+        "branch": repo_details.branch,
+        "contextId": repo_details.contextId
+    }
+    for doc in github_documents:
+        doc.metadata.update(github_metadata)
+    
+    return github_documents
+
 @app.post("/api/sync/github", response_model=SyncResponse)
 async def sync_github(repo_details: GitHubRepoRequest):
     """Sync data from GitHub repository using LlamaIndex GithubRepositoryReader."""
     try:
-        import asyncio
-        
         logger.info(f"GitHub sync requested for {repo_details.owner}/{repo_details.repo} with context: {repo_details.contextId}")
         
         # Get GitHub token from environment
@@ -395,48 +705,12 @@ async def sync_github(repo_details: GitHubRepoRequest):
         if not github_token:
             raise HTTPException(status_code=400, detail="GitHub token not configured")
         
-        # Function to run GitHub sync in a separate thread
-        def sync_github_repo():
-            # Initialize GitHub client and reader
-            github_client = GithubClient(github_token=github_token, verbose=True)
-            reader = GithubRepositoryReader(
-                github_client=github_client,
-                owner=repo_details.owner,
-                repo=repo_details.repo,
-                # Filter to include only relevant file types
-                filter_file_extensions=(['.py', '.ts', '.js', '.md', '.txt', '.json', '.yml', '.yaml'], GithubRepositoryReader.FilterType.INCLUDE),
-                # Set verbose=True to fetch issues and PRs as well
-                verbose=True,
-                concurrent_requests=5,
-            )
-            
-            # Load the data from the repository
-            github_documents = reader.load_data(branch=repo_details.branch)
-            
-            # Add custom metadata tags for easy filtering later
-            for doc in github_documents:
-                doc.metadata.update({
-                    "source": "github",
-                    "owner": repo_details.owner,
-                    "repo": repo_details.repo,
-                    "branch": repo_details.branch,
-                    "contextId": repo_details.contextId
-                })
-            
-            return github_documents
-        
         # Run the sync operation in a separate thread to avoid event loop conflicts
-        github_documents = await asyncio.to_thread(sync_github_repo)
+        github_documents = await asyncio.to_thread(load_github_documents, repo_details, github_token)
         
-        # Create ChromaVectorStore from existing collection
-        chroma_vector_store = ChromaVectorStore(chroma_collection=vector_store.collection)
-        
-        # Load the existing index from the vector store
-        index = VectorStoreIndex.from_vector_store(chroma_vector_store)
-        
-        # Insert the new GitHub documents into the existing index
-        for doc in github_documents:
-            index.insert(doc)
+        # Insert the new GitHub documents into the existing index, embedding their chunks in batches
+        await asyncio.to_thread(insert_documents, github_documents)
+        invalidate_query_caches(repo_details.contextId)
         
         return SyncResponse(message=f"Successfully synced {len(github_documents)} documents from {repo_details.owner}/{repo_details.repo}")
         
@@ -444,6 +718,59 @@ async def sync_github(repo_details: GitHubRepoRequest):
         logger.error(f"Error syncing GitHub: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/sync/github/batch", response_model=GitHubBatchSyncResponse)
+async def sync_github_batch(request: GitHubBatchSyncRequest):
+    """
+    Sync several GitHub repositories in one request.
+
+    Repositories are fetched concurrently and their documents inserted together, so chunk
+    embeddings are batched across repositories. A repository that fails to load is
+    reported in its status without failing the others.
+    """
+    try:
+        logger.info(f"GitHub batch sync requested for {len(request.repos)} repositories")
+        
+        github_token = settings.GITHUB_TOKEN
+        if not github_token:
+            raise HTTPException(status_code=400, detail="GitHub token not configured")
+        
+        results = await asyncio.gather(
+            *(asyncio.to_thread(load_github_documents, repo, github_token) for repo in request.repos),
+            return_exceptions=True
+        )
+        
+        documents = []
+        statuses = []
+        synced_contexts = set()
+        for repo, result in zip(request.repos, results):
+            name = f"{repo.owner}/{repo.repo}"
+            if isinstance(result, Exception):
+                logger.error(f"Error syncing GitHub repository {name}: {result}")
+                statuses.append(GitHubRepoSyncStatus(
+                    owner=repo.owner, repo=repo.repo, contextId=repo.contextId,
+                    success=False, message=str(result)
+                ))
+                continue
+            documents.extend(result)
+            synced_contexts.add(repo.contextId)
+            statuses.append(GitHubRepoSyncStatus(
+                owner=repo.owner, repo=repo.repo, contextId=repo.contextId,
+                success=True, message=f"Successfully synced {len(result)} documents from {name}"
+            ))
+        
+        if documents:
+            await asyncio.to_thread(insert_documents, documents)
+            for context_id in synced_contexts:
+                invalidate_query_caches(context_id)
+        
+        return GitHubBatchSyncResponse(results=statuses)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in GitHub batch sync: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/sync/cancel", response_model=SyncResponse)
 async def cancel_sync():
     """Cancel ongoing sync operations."""
@@ -457,121 +784,195 @@ async def cancel_sync():
         logger.error(f"Error cancelling sync: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Headers for Server-Sent Events: no proxy buffering, and an explicit encoding so
+# GZipMiddleware passes events through instead of buffering them for compression
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+    "Content-Encoding": "identity"
+}
+
+def format_sources(source_nodes) -> List[Dict[str, Any]]:
+    """Convert retrieved nodes into the source entries returned to clients."""
+    return [
+        {
+            "id": source_node.node_id,
+            "content": source_node.get_content(),
+            "metadata": source_node.metadata or {}
+        }
+        for source_node in source_nodes
+    ]
+
+def sse_event(payload: Dict[str, Any]) -> str:
+    """Encode a payload as one Server-Sent Events message."""
+    return f"data: {orjson.dumps(payload).decode()}\n\n"
+
+async def replay_events(query_response: QueryResponse):
+    """Stream a cached response as a single token followed by its sources."""
+    yield sse_event({"token": query_response.answer})
+    yield sse_event({"sources": query_response.sources})
+
+def query_http_error(e: Exception) -> HTTPException:
+    """Log a query failure and map it to the HTTP error returned to the client."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, ImportError):
+        logger.error(f"Import error in query endpoint: {e}", exc_info=True)
+        return HTTPException(
+            status_code=500,
+            detail="Configuration error: Missing required dependencies. Please check server setup."
+        )
+    # RateLimitError and APIConnectionError subclass APIError, so they are checked first
+    if isinstance(e, RateLimitError):
+        logger.error(f"OpenAI rate limit exceeded: {e}", exc_info=True)
+        return HTTPException(
+            status_code=429,
+            detail="AI service rate limit exceeded. Please try again in a few moments."
+        )
+    if isinstance(e, APIConnectionError):
+        logger.error(f"OpenAI connection error: {e}", exc_info=True)
+        return HTTPException(
+            status_code=503,
+            detail="Unable to connect to AI service. Please check your internet connection and try again."
+        )
+    if isinstance(e, APIError):
+        logger.error(f"OpenAI API error during query: {e}", exc_info=True)
+        return HTTPException(
+            status_code=503,
+            detail=f"AI service is currently unavailable. Please try again later. Error: {str(e)}"
+        )
+    if isinstance(e, ChromaError):
+        logger.error(f"Vector database error during query: {e}", exc_info=True)
+        return HTTPException(
+            status_code=503,
+            detail="Vector database is temporarily unavailable. Please try again later."
+        )
+    logger.error(f"Unexpected error during query: {e}", exc_info=True)
+    return HTTPException(
+        status_code=500,
+        detail="An internal server error occurred while processing your query. Please try again later."
+    )
+
 @app.post("/api/query", response_model=QueryResponse)
 async def query_knowledge(request: QueryRequest):
     """Query the knowledge base using RAG with LlamaIndex."""
     try:
-        # Configure LlamaIndex settings using custom embedding
-        from custom_openai_embedding import CustomOpenAIEmbedding
-        
-        Settings.embed_model = CustomOpenAIEmbedding(model="text-embedding-3-small")
-        Settings.llm = LlamaOpenAI(
-            model="gpt-4o-mini", 
-            api_key=settings.OPENAI_API_KEY,
-            api_base=settings.OPENAI_BASE_URL
+        # Taken before the answer is computed, so an invalidation while it runs keeps it out of the caches
+        exact_generation = exact_query_cache.generation()
+        semantic_generation = semantic_query_cache.generation()
+        
+        # Repeated questions are answered straight from the exact-match cache
+        cached_response = exact_query_cache.get(request.contextId, request.question)
+        if cached_response is not None:
+            logger.info(f"Query cache hit for context {request.contextId}: {request.question}")
+            return cached_response
+        
+        # Near-duplicate questions in the same context reuse the cached answer. The query
+        # embedding is memoized, so the retriever below does not compute it again.
+        query_embedding = await Settings.embed_model.aget_query_embedding(request.question)
+        cached_response = semantic_query_cache.get(request.contextId, query_embedding)
+        if cached_response is not None:
+            logger.info(f"Semantic cache hit for context {request.contextId}: {request.question}")
+            return cached_response
+        
+        # Reuse the query engine (retriever, synthesizer, prompts) built for this context
+        query_engine = get_query_engine(request.contextId)
+        
+        # Query the engine in a worker thread; retrieval and the LLM call are blocking
+        response = await asyncio.to_thread(query_engine.query, request.question)
+        
+        query_response = QueryResponse(
+            answer=response.response,
+            sources=format_sources(response.source_nodes)
         )
+        exact_query_cache.put(request.contextId, request.question, query_response, exact_generation)
+        semantic_query_cache.put(request.contextId, query_embedding, query_response, semantic_generation)
+        return query_response
         
-        # Create ChromaVectorStore from existing collection
-        chroma_vector_store = ChromaVectorStore(chroma_collection=vector_store.collection)
-        
-        # Load the index from the vector store
-        index = VectorStoreIndex.from_vector_store(chroma_vector_store)
-        
-        # Create metadata filter for contextId
-        filters = MetadataFilters(
-            filters=[
-                MetadataFilter(key="contextId", value=request.contextId)
-            ]
-        )
-        
-        # Create query engine with context filter
-        query_engine = index.as_query_engine(filters=filters)
-        
-        # Query the engine
-        response = query_engine.query(request.question)
-        
-        # Process the response
-        answer = response.response
-        sources = []
-        
-        for i, source_node in enumerate(response.source_nodes):
-            # Extract metadata from the source node
-            metadata = source_node.metadata or {}
-            
-            # Create source entry
-            sources.append({
-                "id": source_node.node_id,
-                "content": source_node.get_content(),
-                "metadata": metadata
-            })
-        
-        return QueryResponse(answer=answer, sources=sources)
-        
-    except ImportError as e:
-        logger.error(f"Import error in query endpoint: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=500,
-            detail="Configuration error: Missing required dependencies. Please check server setup."
-        )
     except Exception as e:
-        from openai import APIError, RateLimitError, APIConnectionError
-        
-        # Handle specific OpenAI API errors
-        if isinstance(e, APIError):
-            logger.error(f"OpenAI API error during query: {e}", exc_info=True)
-            raise HTTPException(
-                status_code=503,
-                detail=f"AI service is currently unavailable. Please try again later. Error: {str(e)}"
-            )
-        elif isinstance(e, RateLimitError):
-            logger.error(f"OpenAI rate limit exceeded: {e}", exc_info=True)
-            raise HTTPException(
-                status_code=429,
-                detail="AI service rate limit exceeded. Please try again in a few moments."
-            )
-        elif isinstance(e, APIConnectionError):
-            logger.error(f"OpenAI connection error: {e}", exc_info=True)
-            raise HTTPException(
-                status_code=503,
-                detail="Unable to connect to AI service. Please check your internet connection and try again."
-            )
-        
-        # Handle ChromaDB/Vector store errors
-        elif "chroma" in str(e).lower() or "vector" in str(e).lower():
-            logger.error(f"Vector database error during query: {e}", exc_info=True)
-            raise HTTPException(
-                status_code=503,
-                detail="Vector database is temporarily unavailable. Please try again later."
-            )
-        
-        # Handle general errors
-        else:
-            logger.error(f"Unexpected error during query: {e}", exc_info=True)
-            raise HTTPException(
-                status_code=500,
-                detail="An internal server error occurred while processing your query. Please try again later."
+        raise query_http_error(e)
+
+@app.post("/api/query/stream")
+async def stream_query(request: QueryRequest):
+    """
+    Query the knowledge base, streaming the answer token by token as Server-Sent Events.
+
+    Each event carries a JSON object: {"token": ...} for every piece of the answer,
+    then {"sources": [...]} once the answer is complete, or {"error": ...} if the
+    completion fails midway.
+    """
+    try:
+        # Taken before the answer is computed, so an invalidation while it streams keeps it out of the caches
+        exact_generation = exact_query_cache.generation()
+        semantic_generation = semantic_query_cache.generation()
+        cached_response = exact_query_cache.get(request.contextId, request.question)
+        query_embedding = None
+        if cached_response is None:
+            query_embedding = await Settings.embed_model.aget_query_embedding(request.question)
+            cached_response = semantic_query_cache.get(request.contextId, query_embedding)
+        if cached_response is not None:
+            logger.info(f"Query cache hit for context {request.contextId}: {request.question}")
+            return StreamingResponse(
+                replay_events(cached_response),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
             )
 
+        # Retrieval runs before the first token, so its errors still map to HTTP statuses
+        query_engine = get_query_engine(request.contextId, streaming=True)
+        streaming_response = await asyncio.to_thread(query_engine.query, request.question)
+    except Exception as e:
+        raise query_http_error(e)
+
+    sources = format_sources(streaming_response.source_nodes)
+
+    async def generate_events():
+        tokens = []
+        token_gen = streaming_response.response_gen
+        try:
+            # Each next() blocks on the LLM stream, so pull tokens in a worker thread
+            while (token := await asyncio.to_thread(next, token_gen, None)) is not None:
+                tokens.append(token)
+                yield sse_event({"token": token})
+        except Exception as e:
+            logger.error(f"Error while streaming answer: {e}", exc_info=True)
+            yield sse_event({"error": query_http_error(e).detail})
+            return
+        yield sse_event({"sources": sources})
+
+        query_response = QueryResponse(answer="".join(tokens), sources=sources)
+        exact_query_cache.put(request.contextId, request.question, query_response, exact_generation)
+        semantic_query_cache.put(request.contextId, query_embedding, query_response, semantic_generation)
+
+    return StreamingResponse(generate_events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# System prompt shared by the single and batch query transform endpoints
+TRANSFORM_SYSTEM_PROMPT = (
+    "You are an expert at rewriting user questions into detailed, specific search queries "
+    "for a Retrieval-Augmented Generation (RAG) system. The system contains knowledge from "
+    "documents, GitHub issues, pull requests, and Slack conversations. "
+    "Rewrite the following user question to be as specific as possible, including potential "
+    "keywords and concepts that would help find the most relevant information. "
+    "Focus on technical details, code snippets, error messages, feature names, and context "
+    "that would improve search accuracy. Make the query comprehensive but focused."
+)
+
+# Appended for batches, so every question is rewritten by one completion
+BATCH_TRANSFORM_INSTRUCTIONS = (
+    " You will receive a JSON array of user questions. Rewrite each question independently "
+    'and respond with a JSON object of the form {"transformed_questions": [...]} holding '
+    "exactly one rewritten query per question, in the same order."
+)
+
 @app.post("/api/query/transform", response_model=TransformResponse)
 async def transform_query(request: TransformRequest):
     """Transform a user's simple question into a detailed, optimized query for better RAG results."""
     try:
-        # Define the powerful system prompt for query transformation
-        system_prompt = (
-            "You are an expert at rewriting user questions into detailed, specific search queries "
-            "for a Retrieval-Augmented Generation (RAG) system. The system contains knowledge from "
-            "documents, GitHub issues, pull requests, and Slack conversations. "
-            "Rewrite the following user question to be as specific as possible, including potential "
-            "keywords and concepts that would help find the most relevant information. "
-            "Focus on technical details, code snippets, error messages, feature names, and context "
-            "that would improve search accuracy. Make the query comprehensive but focused."
-        )
-        
-        # Use the existing OpenAI client to call GPT-4o-mini
-        response = client.chat.completions.create(
+        # Use the existing async OpenAI client to call GPT-4o-mini without blocking the event loop
+        response = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": TRANSFORM_SYSTEM_PROMPT},
                 {"role": "user", "content": request.question}
             ],
             temperature=0.3,  # Lower temperature for more consistent transformations
@@ -588,5 +989,32 @@ async def transform_query(request: TransformRequest):
         logger.error(f"Error transforming query: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to transform query: {str(e)}")
 
+@app.post("/api/query/transform/batch", response_model=List[TransformResponse])
+async def transform_queries(request: TransformBatchRequest):
+    """Transform several questions with a single LLM call, returning them in request order."""
+    try:
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": TRANSFORM_SYSTEM_PROMPT + BATCH_TRANSFORM_INSTRUCTIONS},
+                {"role": "user", "content": orjson.dumps(request.questions).decode()}
+            ],
+            temperature=0.3,
+            max_tokens=500 * len(request.questions),
+            response_format={"type": "json_object"}
+        )
+        
+        transformed = orjson.loads(response.choices[0].message.content).get("transformed_questions")
+        if not isinstance(transformed, list) or len(transformed) != len(request.questions):
+            raise ValueError(f"expected {len(request.questions)} transformed questions in the model output")
+        
+        logger.info(f"Transformed {len(transformed)} queries in one batch")
+        
+        return [TransformResponse(transformed_question=str(question).strip()) for question in transformed]
+        
+    except Exception as e:
+        logger.error(f"Error transforming query batch: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to transform queries: {str(e)}")
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="127.0.0.1", port=8000, loop="uvloop", http="httptools", log_level="info")
\ No newline at end of file
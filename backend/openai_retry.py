@@ -0,0 +1,149 @@
+"""
+Retry and rate limiting helpers for OpenAI API calls
+
+This module provides a token-bucket rate limiter shared by all callers of an
+endpoint, plus retry wrappers that back off exponentially (with jitter) and
+honor the Retry-After header returned with 429 responses.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errors worth retrying: rate limits, network failures and 5xx responses
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+
+class RateLimiter:
+    """Token bucket allowing max_rate calls per time_period seconds, usable from threads and coroutines."""
+
+    def __init__(self, max_rate: float, time_period: float = 60.0):
+        """
+        Initialize the bucket full.
+
+        Args:
+            max_rate: Number of calls allowed per time period
+            time_period: Length of the time period in seconds
+        """
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            refill = (now - self._updated) * self.max_rate / self.time_period
+            self._tokens = min(self.max_rate, self._tokens + refill)
+            self._updated = now
+            # Going negative queues the caller behind earlier reservations
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens * self.time_period / self.max_rate
+
+    def acquire(self) -> None:
+        """Block until a call is allowed."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self) -> None:
+        """Wait without blocking the event loop until a call is allowed."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the server-requested delay from a failed response, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def retry_delay(error: Exception, attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    Compute how long to wait before retrying a failed call.
+
+    Args:
+        error: The exception raised by the failed call
+        attempt: Zero-based number of the attempt that failed
+        base: Initial backoff in seconds
+        cap: Maximum backoff in seconds
+
+    Returns:
+        The Retry-After delay if the server sent one, otherwise exponential backoff with full jitter
+    """
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return min(retry_after, cap)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def call_with_retry(
+    func: Callable[..., T],
+    *args: Any,
+    limiter: Optional[RateLimiter] = None,
+    max_attempts: int = settings.OPENAI_MAX_RETRIES,
+    **kwargs: Any
+) -> T:
+    """Call func, waiting for the rate limiter before each attempt and retrying transient errors."""
+    for attempt in range(max_attempts):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_attempts - 1:
+                raise
+            delay = retry_delay(e, attempt)
+            logger.warning(f"OpenAI call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def acall_with_retry(
+    func: Callable[..., Awaitable[T]],
+    *args: Any,
+    limiter: Optional[RateLimiter] = None,
+    max_attempts: int = settings.OPENAI_MAX_RETRIES,
+    **kwargs: Any
+) -> T:
+    """Async version of call_with_retry."""
+    for attempt in range(max_attempts):
+        if limiter is not None:
+            await limiter.aacquire()
+        try:
+            return await func(*args, **kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_attempts - 1:
+                raise
+            delay = retry_delay(e, attempt)
+            logger.warning(f"OpenAI call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+# Shared limiter for the embeddings endpoint; the provider's limit applies per API key
+embedding_rate_limiter = RateLimiter(settings.OPENAI_EMBEDDING_RPM, 60.0)
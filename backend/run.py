@@ -35,10 +35,17 @@ if __name__ == "__main__":
     print("📖 API Documentation: http://127.0.0.1:8000/docs")
     print("🔍 Health Check: http://127.0.0.1:8000/")
     
+    from settings import settings
+    
+    # uvloop and httptools ship with uvicorn[standard]. Hot reload adds a supervisor
+    # process, so it is a development-only option (DEBUG=true, single worker).
     uvicorn.run(
         "main:app",  # Use import string instead of importing the app directly
         host="127.0.0.1",
         port=8000,
-        reload=True,
+        workers=settings.WORKERS,
+        reload=settings.DEBUG and settings.WORKERS == 1,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Query response caches for Synapse Knowledge Base
+
+This module caches query responses per contextId: an exact cache keyed by a hash
+of the question answers repeated questions without any API call, and a semantic
+cache keyed by the embedding of the question answers near-duplicates without
+another retrieval and LLM completion.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Initial number of rows allocated for a context's embedding matrix
+_INITIAL_CAPACITY = 64
+
+
+class _ContextEntries:
+    """Normalized query embeddings of one context, stacked in a matrix, with their cached values and expiry times."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.vectors: Optional[np.ndarray] = None
+        self.expires_at: Optional[np.ndarray] = None
+        self.values: List[Any] = []
+        # Slot overwritten next once the context is full (oldest entry first)
+        self.next_slot = 0
+
+    def lookup(self, query: np.ndarray, threshold: float, now: float) -> Optional[Any]:
+        """Return the value of the most similar unexpired cached query if it clears the threshold."""
+        if not self.values or self.vectors.shape[1] != query.shape[0]:
+            return None
+        count = len(self.values)
+        scores = self.vectors[:count] @ query
+        scores[self.expires_at[:count] < now] = -np.inf
+        best = int(np.argmax(scores))
+        return self.values[best] if scores[best] >= threshold else None
+
+    def add(self, query: np.ndarray, value: Any, expires_at: float) -> None:
+        """Store a value, growing the matrix geometrically and evicting FIFO when full."""
+        if self.vectors is None or self.vectors.shape[1] != query.shape[0]:
+            capacity = min(_INITIAL_CAPACITY, self.max_entries)
+            self.vectors = np.empty((capacity, query.shape[0]), dtype=np.float32)
+            self.expires_at = np.empty(capacity, dtype=np.float64)
+            self.values = []
+            self.next_slot = 0
+
+        count = len(self.values)
+        if count < self.max_entries:
+            if count == len(self.vectors):
+                capacity = min(2 * count, self.max_entries)
+                grown = np.empty((capacity, query.shape[0]), dtype=np.float32)
+                grown[:count] = self.vectors
+                self.vectors = grown
+                grown_expiry = np.empty(capacity, dtype=np.float64)
+                grown_expiry[:count] = self.expires_at
+                self.expires_at = grown_expiry
+            slot = count
+            self.values.append(value)
+        else:
+            # Every entry shares the cache's TTL, so the oldest entry is also the first to expire
+            slot = self.next_slot
+            self.values[slot] = value
+            self.next_slot = (self.next_slot + 1) % self.max_entries
+        self.vectors[slot] = query
+        self.expires_at[slot] = expires_at
+
+
+class SemanticQueryCache:
+    """Per-context cache returning a stored response when a new query's cosine similarity to a cached one is high enough."""
+
+    def __init__(self, threshold: float = 0.97, max_entries: int = 10_000,
+                 ttl: float = 600.0, max_contexts: int = 64):
+        """
+        Args:
+            threshold: Minimum cosine similarity between two queries to reuse a response
+            max_entries: Maximum number of cached queries per context
+            ttl: Seconds a cached response stays valid
+            max_contexts: Maximum number of contexts cached at once; the least recently used is evicted
+        """
+        if max_entries < 1:
+            raise ValueError(f"Semantic cache max_entries must be at least 1, got {max_entries}")
+        if max_contexts < 1:
+            raise ValueError(f"Semantic cache max_contexts must be at least 1, got {max_contexts}")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_contexts = max_contexts
+        self._contexts: "OrderedDict[str, _ContextEntries]" = OrderedDict()
+        # Bumped by every invalidation so answers computed before it are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        """Convert an embedding to a unit-length float32 vector (None for a zero vector)."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def generation(self) -> int:
+        """Return the invalidation generation; take it before computing a response and pass it to put."""
+        with self._lock:
+            return self._generation
+
+    def get(self, context_id: str, embedding: List[float]) -> Optional[Any]:
+        """
+        Look up a cached response for a query.
+
+        Args:
+            context_id: Context the query is scoped to
+            embedding: Embedding of the query
+
+        Returns:
+            The cached response of the most similar query, or None on a miss
+        """
+        query = self._normalize(embedding)
+        if query is None:
+            return None
+        with self._lock:
+            entries = self._contexts.get(context_id)
+            if entries is None:
+                return None
+            self._contexts.move_to_end(context_id)
+            return entries.lookup(query, self.threshold, time.monotonic())
+
+    def put(self, context_id: str, embedding: List[float], value: Any,
+            generation: Optional[int] = None) -> None:
+        """
+        Cache the response to a query.
+
+        Args:
+            context_id: Context the query is scoped to
+            embedding: Embedding of the query
+            value: Response to return for similar queries
+            generation: Result of generation() taken before the response was computed; the
+                response is dropped if the cache was invalidated since
+        """
+        query = self._normalize(embedding)
+        if query is None:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            entries = self._contexts.get(context_id)
+            if entries is None:
+                entries = self._contexts[context_id] = _ContextEntries(self.max_entries)
+                if len(self._contexts) > self.max_contexts:
+                    self._contexts.popitem(last=False)
+            else:
+                self._contexts.move_to_end(context_id)
+            entries.add(query, value, time.monotonic() + self.ttl)
+
+    def invalidate(self, context_id: Optional[str] = None) -> None:
+        """
+        Drop cached responses after the knowledge base changes.
+
+        Args:
+            context_id: Context whose responses are stale (None clears every context)
+        """
+        with self._lock:
+            self._generation += 1
+            if context_id is None:
+                self._contexts.clear()
+            else:
+                self._contexts.pop(context_id, None)
+        logger.info(f"Invalidated semantic query cache for context: {context_id or 'all'}")
+
+
+class ExactQueryCache:
+    """LRU cache with a time-to-live, keyed by (contextId, hash of the question)."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 600.0):
+        """
+        Args:
+            max_entries: Maximum number of cached responses across all contexts
+            ttl: Seconds a cached response stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        # Bumped by every invalidation so answers computed before it are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(context_id: str, question: str) -> Tuple[str, str]:
+        """Build a compact cache key for a question."""
+        return context_id, hashlib.blake2b(question.encode("utf-8"), digest_size=16).hexdigest()
+
+    def generation(self) -> int:
+        """Return the invalidation generation; take it before computing a response and pass it to put."""
+        with self._lock:
+            return self._generation
+
+    def get(self, context_id: str, question: str) -> Optional[Any]:
+        """Return the cached response to exactly this question, or None if missing or expired."""
+        key = self._key(context_id, question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, context_id: str, question: str, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Cache a response, evicting the least recently used entry when full.
+
+        The response is dropped if generation (taken before it was computed) is stale.
+        """
+        key = self._key(context_id, question)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, context_id: Optional[str] = None) -> None:
+        """Drop cached responses of one context (None clears every context)."""
+        with self._lock:
+            self._generation += 1
+            if context_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == context_id]:
+                    del self._entries[key]
+
+
+# Global instances for the application
+semantic_query_cache = SemanticQueryCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    max_contexts=settings.SEMANTIC_CACHE_MAX_CONTEXTS
+)
+exact_query_cache = ExactQueryCache(
+    max_entries=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL
+)
+
+
+def invalidate_query_caches(context_id: Optional[str] = None) -> None:
+    """
+    Drop every cached response of a context after its documents change.
+
+    Args:
+        context_id: Context whose responses are stale (None clears every context)
+    """
+    exact_query_cache.invalidate(context_id)
+    semantic_query_cache.invalidate(context_id)
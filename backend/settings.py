@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
@@ -13,9 +14,15 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     OPENAI_BASE_URL: str
     
+    # OpenAI rate limiting (requests per minute for the embeddings endpoint) and retries
+    OPENAI_EMBEDDING_RPM: int = 3500
+    OPENAI_MAX_RETRIES: int = 6
+    
     # Integration Tokens (Optional - some features may not work without them)
     SLACK_BOT_TOKEN: Optional[str] = None
     GITHUB_TOKEN: Optional[str] = None
+    # Parallel blob fetches per GitHub sync; well within a token's 5000 requests/hour
+    GITHUB_CONCURRENT_REQUESTS: int = 25
     
     # Application Configuration
     DEBUG: bool = False
@@ -24,9 +31,34 @@ class Settings(BaseSettings):
     # Server Configuration
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Worker processes; keep at 1 with the embedded Chroma database, which must not be
+    # opened by several processes at once (set CHROMA_SERVER_URL to run more)
+    WORKERS: int = 1
+    # Load the index, Chroma segments and LlamaIndex modules before serving the first request
+    WARMUP_ON_STARTUP: bool = True
     
     # Database Configuration
     CHROMA_DB_PATH: str = "./chroma_db"
+    # URL of a Chroma server (e.g. "http://127.0.0.1:8001" for `chroma run --path ./chroma_db
+    # --port 8001`); when set, every worker shares that server's index instead of loading its own
+    CHROMA_SERVER_URL: Optional[str] = None
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache/embeddings.sqlite3"
+    # Storage precision of cached embeddings. "fp32" keeps them exact; opt in to "fp16" (2x smaller,
+    # near-lossless) or "int8" (4x smaller, quantized) to trade retrieval accuracy for disk space
+    EMBEDDING_CACHE_PRECISION: str = "fp32"
+    EMBEDDING_DIMENSIONS: Optional[int] = None  # e.g. 512 to shrink text-embedding-3 vectors
+    # Rows written per Chroma add call; large single adds are slow and memory hungry
+    CHROMA_ADD_BATCH_SIZE: int = 2000
+    
+    # Semantic query cache (cosine similarity needed to reuse an answer, entries per context,
+    # contexts kept at once); entries expire after RESPONSE_CACHE_TTL like exact-match ones
+    SEMANTIC_CACHE_THRESHOLD: float = 0.97
+    SEMANTIC_CACHE_SIZE: int = 10000
+    SEMANTIC_CACHE_MAX_CONTEXTS: int = 64
+    
+    # Exact-match query response cache (entries across all contexts, time-to-live in seconds)
+    RESPONSE_CACHE_SIZE: int = 1024
+    RESPONSE_CACHE_TTL: int = 600
     
     # This tells Pydantic to load from a .env file
     model_config = SettingsConfigDict(
@@ -35,6 +67,11 @@ class Settings(BaseSettings):
         case_sensitive=True
     )
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load the settings once; later calls return the same instance without re-reading .env."""
+    return Settings()
+
 # Create a single, global instance of the settings
 # This will be imported throughout the application
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Slack history helpers for Synapse
+
+This module wraps the cursor-paginated Slack Web API calls used when inspecting
+or ingesting channels, fetching independent channels concurrently.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from slack_sdk import WebClient
+
+logger = logging.getLogger(__name__)
+
+# Largest page size Slack accepts for conversations.history / conversations.list
+MAX_PAGE_SIZE = 200
+
+
+def list_channels(client: WebClient, types: str = "public_channel,private_channel") -> List[Dict[str, Any]]:
+    """
+    List every channel visible to the bot, following pagination cursors.
+
+    Args:
+        client: Slack WebClient to issue the calls with
+        types: Comma-separated conversation types to include
+
+    Returns:
+        List of Slack channel objects
+    """
+    channels: List[Dict[str, Any]] = []
+    cursor = None
+    while True:
+        response = client.conversations_list(types=types, limit=MAX_PAGE_SIZE, cursor=cursor)
+        channels.extend(response["channels"])
+        cursor = response.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            return channels
+
+
+def fetch_channel_history(
+    client: WebClient,
+    channel_id: str,
+    limit: Optional[int] = None,
+    oldest: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fetch messages from a channel, newest first, following pagination cursors.
+
+    Args:
+        client: Slack WebClient to issue the calls with
+        channel_id: ID of the channel to read
+        limit: Maximum number of messages to return (None fetches the whole history)
+        oldest: Only return messages after this Slack timestamp
+
+    Returns:
+        List of Slack message objects
+    """
+    messages: List[Dict[str, Any]] = []
+    cursor = None
+    while limit is None or len(messages) < limit:
+        page_size = MAX_PAGE_SIZE if limit is None else min(MAX_PAGE_SIZE, limit - len(messages))
+        kwargs = {"channel": channel_id, "limit": page_size, "cursor": cursor}
+        if oldest:
+            kwargs["oldest"] = oldest
+        response = client.conversations_history(**kwargs)
+        messages.extend(response["messages"])
+        cursor = response.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            break
+    return messages if limit is None else messages[:limit]
+
+
+def fetch_histories(
+    client: WebClient,
+    channel_ids: List[str],
+    limit: Optional[int] = None,
+    oldest: Optional[str] = None,
+    max_workers: int = 8
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch the history of several channels concurrently.
+
+    Pagination within a channel is sequential (each cursor depends on the previous
+    page), so channels are the unit of parallelism.
+
+    Args:
+        client: Slack WebClient shared by all worker threads
+        channel_ids: IDs of the channels to read
+        limit: Maximum number of messages per channel (None fetches everything)
+        oldest: Only return messages after this Slack timestamp
+        max_workers: Maximum number of channels fetched at the same time
+
+    Returns:
+        Dictionary mapping each channel ID to its messages
+    """
+    if not channel_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(channel_ids))) as executor:
+        futures = {
+            channel_id: executor.submit(fetch_channel_history, client, channel_id, limit, oldest)
+            for channel_id in channel_ids
+        }
+        return {channel_id: future.result() for channel_id, future in futures.items()}
+
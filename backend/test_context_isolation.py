@@ -13,84 +13,86 @@ Test Scenario:
 - Query for "fruit" in each context and verify isolation
 """
 
-import requests
+import hashlib
 import json
-import time
-import tempfile
+import logging
+import logging.handlers
+import sys
 import os
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from testing_http import jloads, jpost, make_client, wait_until_indexed
 
 # Configuration
 BASE_URL = "http://127.0.0.1:8000"
 TIMEOUT = 30
 
-def create_test_document(content: str, filename: str) -> str:
-    """Create a temporary test document with the given content."""
-    temp_dir = Path("./temp_test_docs")
-    temp_dir.mkdir(exist_ok=True)
-    
-    file_path = temp_dir / filename
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(content)
-    
-    return str(file_path)
+# Progress messages are buffered and written in one go at the end of each test
+# (or as soon as a failure is logged), instead of one stdout write per line
+LOG_BUFFER = logging.handlers.MemoryHandler(
+    1024, flushLevel=logging.ERROR, target=logging.StreamHandler(sys.stdout)
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(LOG_BUFFER)
+
+# Independent uploads and queries run concurrently on this many threads
+MAX_WORKERS = 4
+
+# One thread-safe client shared by every call; transient failures are retried
+CLIENT = make_client(BASE_URL, TIMEOUT)
 
-def cleanup_test_documents():
-    """Clean up temporary test documents."""
-    temp_dir = Path("./temp_test_docs")
-    if temp_dir.exists():
-        for file in temp_dir.glob("*"):
-            file.unlink()
-        temp_dir.rmdir()
+def run_parallel(func, calls):
+    """Run func once per argument tuple concurrently and return the results in order."""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        return list(executor.map(lambda args: func(*args), calls))
 
-def test_health_check():
+def check_health():
     """Test that the API is running."""
-    print("🔍 Testing API health check...")
+    logger.info("🔍 Testing API health check...")
     try:
-        response = requests.get(f"{BASE_URL}/", timeout=TIMEOUT)
+        response = CLIENT.get("/")
         assert response.status_code == 200
-        data = response.json()
+        data = jloads(response)
         assert "Synapse API is running" in data["message"]
-        print("✅ API health check passed")
+        logger.info("✅ API health check passed")
         return True
     except Exception as e:
-        print(f"❌ API health check failed: {e}")
+        logger.error(f"❌ API health check failed: {e}")
         return False
 
-def test_upload_with_context(content: str, filename: str, context_id: str):
+def upload_with_context(content: str, filename: str, context_id: str):
     """Test uploading a document with a specific contextId."""
-    print(f"📤 Testing upload: {filename} to context '{context_id}'...")
-    
-    # Create test document
-    file_path = create_test_document(content, filename)
+    logger.info(f"📤 Testing upload: {filename} to context '{context_id}'...")
     
     try:
-        with open(file_path, "rb") as f:
-            files = {"file": (filename, f, "text/plain")}
-            data = {"contextId": context_id}
-            
-            response = requests.post(
-                f"{BASE_URL}/api/upload",
-                files=files,
-                data=data,
-                timeout=TIMEOUT
-            )
+        # Upload the content straight from memory; nothing is written to disk
+        content_bytes = content.encode("utf-8")
+        files = {"file": (filename, content_bytes, "text/plain")}
+        # The hash lets the server skip re-processing content it has already indexed
+        data = {"contextId": context_id, "content_hash": hashlib.sha256(content_bytes).hexdigest()}
+        
+        response = CLIENT.post(
+            "/api/upload",
+            files=files,
+            data=data
+        )
         
         if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Upload successful: {result['message']}")
+            result = jloads(response)
+            logger.info(f"✅ Upload successful: {result['message']}")
             return True
         else:
-            print(f"❌ Upload failed: {response.status_code} - {response.text}")
+            logger.error(f"❌ Upload failed: {response.status_code} - {response.text}")
             return False
             
     except Exception as e:
-        print(f"❌ Upload error: {e}")
+        logger.error(f"❌ Upload error: {e}")
         return False
 
-def test_query_with_context(question: str, context_id: str, expected_keyword: str):
+def query_with_context(question: str, context_id: str, expected_keyword: str):
     """Test querying with a specific contextId and verify the response contains expected content."""
-    print(f"🔍 Testing query: '{question}' in context '{context_id}'...")
+    logger.info(f"🔍 Testing query: '{question}' in context '{context_id}'...")
     
     try:
         payload = {
@@ -98,91 +100,105 @@ def test_query_with_context(question: str, context_id: str, expected_keyword: st
             "contextId": context_id
         }
         
-        response = requests.post(
-            f"{BASE_URL}/api/query",
-            json=payload,
-            timeout=TIMEOUT
-        )
+        response = jpost(CLIENT, "/api/query", payload)
         
         if response.status_code == 200:
-            result = response.json()
-            answer = result["answer"].lower()
+            result = jloads(response)
+            answer = result["answer"]
             sources = result["sources"]
             
-            print(f"📝 Answer: {result['answer'][:200]}...")
-            print(f"📚 Sources found: {len(sources)}")
+            logger.info(f"📝 Answer: {answer[:200]}...")
+            logger.info(f"📚 Sources found: {len(sources)}")
             
-            # Check if the answer contains the expected keyword
-            if expected_keyword.lower() in answer:
-                print(f"✅ Query successful: Found '{expected_keyword}' in answer")
+            # Check if the answer contains the expected keyword (each side lowercased once)
+            if expected_keyword.lower() in answer.lower():
+                logger.info(f"✅ Query successful: Found '{expected_keyword}' in answer")
                 
                 # Verify all sources have the correct contextId
                 context_verified = True
                 for i, source in enumerate(sources):
                     source_context = source.get("metadata", {}).get("contextId")
                     if source_context != context_id:
-                        print(f"❌ Context isolation failed: Source {i} has contextId '{source_context}', expected '{context_id}'")
+                        logger.error(f"❌ Context isolation failed: Source {i} has contextId '{source_context}', expected '{context_id}'")
                         context_verified = False
                 
                 if context_verified:
-                    print(f"✅ Context isolation verified: All sources belong to '{context_id}'")
+                    logger.info(f"✅ Context isolation verified: All sources belong to '{context_id}'")
                     return True
                 else:
                     return False
             else:
-                print(f"❌ Query failed: Expected '{expected_keyword}' not found in answer")
+                logger.error(f"❌ Query failed: Expected '{expected_keyword}' not found in answer")
                 return False
                 
         else:
-            print(f"❌ Query failed: {response.status_code} - {response.text}")
+            logger.error(f"❌ Query failed: {response.status_code} - {response.text}")
             return False
             
     except Exception as e:
-        print(f"❌ Query error: {e}")
+        logger.error(f"❌ Query error: {e}")
         return False
 
-def test_cross_context_isolation(question: str, context_a: str, context_b: str, keyword_a: str, keyword_b: str):
-    """Test that queries in one context don't return data from another context."""
-    print(f"🔒 Testing cross-context isolation...")
-    
-    # Query context A - should only find keyword A, not keyword B
-    print(f"   Testing context '{context_a}' isolation...")
+def check_context_isolation(question: str, context_id: str, keyword: str, other_keyword: str):
+    """Check that a query in one context finds its own keyword and not the other context's."""
+    logger.info(f"   Testing context '{context_id}' isolation...")
     try:
         payload = {
             "question": question,
-            "contextId": context_a
+            "contextId": context_id
         }
         
-        response = requests.post(f"{BASE_URL}/api/query", json=payload, timeout=TIMEOUT)
+        response = jpost(CLIENT, "/api/query", payload)
         
         if response.status_code == 200:
-            result = response.json()
-            answer = result["answer"].lower()
-            
-            has_keyword_a = keyword_a.lower() in answer
-            has_keyword_b = keyword_b.lower() in answer
+            # Lowercase the answer once and test both keywords against it
+            answer = jloads(response)["answer"].lower()
+            has_keyword = keyword.lower() in answer
+            has_other_keyword = other_keyword.lower() in answer
             
-            if has_keyword_a and not has_keyword_b:
-                print(f"✅ Context '{context_a}' isolation verified: Found '{keyword_a}', no '{keyword_b}'")
+            if has_keyword and not has_other_keyword:
+                logger.info(f"✅ Context '{context_id}' isolation verified: Found '{keyword}', no '{other_keyword}'")
                 return True
-            elif has_keyword_b:
-                print(f"❌ Context isolation failed: Found '{keyword_b}' in context '{context_a}'")
+            elif has_other_keyword:
+                logger.error(f"❌ Context isolation failed: Found '{other_keyword}' in context '{context_id}'")
                 return False
             else:
-                print(f"⚠️  Context '{context_a}' query returned no relevant results")
+                logger.warning(f"⚠️  Context '{context_id}' query returned no relevant results")
                 return False
         else:
-            print(f"❌ Query failed: {response.status_code}")
+            logger.error(f"❌ Query failed: {response.status_code}")
             return False
             
     except Exception as e:
-        print(f"❌ Cross-context test error: {e}")
+        logger.error(f"❌ Cross-context test error: {e}")
         return False
 
-def run_comprehensive_test():
+def cross_context_isolation(question: str, context_a: str, context_b: str, keyword_a: str, keyword_b: str):
+    """Test that queries in one context don't return data from another context."""
+    logger.info(f"🔒 Testing cross-context isolation...")
+    
+    # Query both contexts at once: A should only find keyword A, B only keyword B
+    results = run_parallel(check_context_isolation, [
+        (question, context_a, keyword_a, keyword_b),
+        (question, context_b, keyword_b, keyword_a)
+    ])
+    return all(results)
+
+# Appended to the results report when every test passes
+ACCEPTANCE_REPORT = """
+🎉 ALL TESTS PASSED! Context isolation is working correctly.
+
+✅ Acceptance Criteria Met:
+   ✓ All ingestion endpoints require contextId
+   ✓ Data is correctly tagged with contextId
+   ✓ Query endpoint requires contextId
+   ✓ Queries only return data from the specified context
+   ✓ Cross-context contamination is prevented"""
+
+def test_context_isolation():
     """Run the complete end-to-end context isolation test."""
-    print("🚀 Starting Comprehensive Context Isolation Test")
-    print("=" * 60)
+    logger.info("🚀 Starting Comprehensive Context Isolation Test")
+    logger.info("=" * 60)
     
     # Test data
     apple_content = """
@@ -223,72 +239,62 @@ def run_comprehensive_test():
     They ripen after being picked and turn from green to yellow to brown.
     """
     
+    # The backend health check runs once per session (conftest.py) or in __main__
     tests_passed = 0
-    total_tests = 6
+    total_tests = 5
     
     try:
-        # Test 1: Health Check
-        if test_health_check():
-            tests_passed += 1
-        
-        # Test 2: Upload apples document to project-a
-        if test_upload_with_context(apple_content, "apples_info.txt", "project-a"):
-            tests_passed += 1
+        # Tests 1-2: Upload apples to project-a and bananas to project-b concurrently
+        upload_results = run_parallel(upload_with_context, [
+            (apple_content, "apples_info.txt", "project-a"),
+            (banana_content, "bananas_info.txt", "project-b")
+        ])
+        tests_passed += sum(upload_results)
         
         # Wait for indexing
-        print("⏳ Waiting for document indexing...")
-        time.sleep(3)
+        logger.info("⏳ Waiting for document indexing...")
+        run_parallel(wait_until_indexed, [(CLIENT, "project-a"), (CLIENT, "project-b")])
         
-        # Test 3: Upload bananas document to project-b  
-        if test_upload_with_context(banana_content, "bananas_info.txt", "project-b"):
-            tests_passed += 1
-        
-        # Wait for indexing
-        print("⏳ Waiting for document indexing...")
-        time.sleep(3)
-        
-        # Test 4: Query for fruit in project-a (should get apples)
-        if test_query_with_context("What specific fruit is discussed in the available documents?", "project-a", "apple"):
-            tests_passed += 1
+        # Tests 3-4: Query for fruit in both contexts concurrently
+        # (project-a should get apples, project-b should get bananas)
+        question = "What specific fruit is discussed in the available documents?"
+        query_results = run_parallel(query_with_context, [
+            (question, "project-a", "apple"),
+            (question, "project-b", "banana")
+        ])
+        tests_passed += sum(query_results)
         
-        # Test 5: Query for fruit in project-b (should get bananas)
-        if test_query_with_context("What specific fruit is discussed in the available documents?", "project-b", "banana"):
-            tests_passed += 1
-        
-        # Test 6: Cross-context isolation test
-        if test_cross_context_isolation("fruit information", "project-a", "project-b", "apple", "banana"):
+        # Test 5: Cross-context isolation test
+        if cross_context_isolation("fruit information", "project-a", "project-b", "apple", "banana"):
             tests_passed += 1
         
     except Exception as e:
-        print(f"❌ Test suite error: {e}")
+        logger.error(f"❌ Test suite error: {e}")
     
     finally:
         # Cleanup
-        cleanup_test_documents()
-    
-    # Results
-    print("\n" + "=" * 60)
-    print("📊 TEST RESULTS")
-    print("=" * 60)
-    print(f"Tests Passed: {tests_passed}/{total_tests}")
+        CLIENT.close()
     
+    # Results, formatted as a single report and logged in one record
+    separator = "=" * 60
+    report = f"\n{separator}\n📊 TEST RESULTS\n{separator}\nTests Passed: {tests_passed}/{total_tests}"
     if tests_passed == total_tests:
-        print("🎉 ALL TESTS PASSED! Context isolation is working correctly.")
-        print("\n✅ Acceptance Criteria Met:")
-        print("   ✓ All ingestion endpoints require contextId")
-        print("   ✓ Data is correctly tagged with contextId")
-        print("   ✓ Query endpoint requires contextId")
-        print("   ✓ Queries only return data from the specified context")
-        print("   ✓ Cross-context contamination is prevented")
-        return True
-    else:
-        print(f"❌ {total_tests - tests_passed} tests failed. Context isolation needs fixes.")
-        return False
+        report += ACCEPTANCE_REPORT
+    logger.info(report)
+    
+    LOG_BUFFER.flush()
+    assert tests_passed == total_tests, f"{total_tests - tests_passed} tests failed. Context isolation needs fixes."
 
 if __name__ == "__main__":
-    print("Context Isolation Test for Synapse Backend")
-    print("Make sure the backend server is running on http://127.0.0.1:8000")
-    print()
+    logger.info("Context Isolation Test for Synapse Backend")
+    logger.info("Make sure the backend server is running on http://127.0.0.1:8000")
+    logger.info("")
     
-    success = run_comprehensive_test()
-    exit(0 if success else 1)
\ No newline at end of file
+    if not check_health():
+        exit(1)
+    
+    try:
+        test_context_isolation()
+    except AssertionError as e:
+        logger.error(f"❌ {e}")
+        exit(1)
\ No newline at end of file
@@ -1,28 +1,45 @@
-import requests
 import json
+import logging
+import logging.handlers
+import sys
 import os
 from dotenv import load_dotenv
-import time
+
+from testing_http import jloads, jpost, make_client, wait_until_indexed
 
 # Load environment variables
 load_dotenv()
 
+# Progress messages are buffered and written in one go at the end of each test
+# (or as soon as a failure is logged), instead of one stdout write per line
+LOG_BUFFER = logging.handlers.MemoryHandler(
+    1024, flushLevel=logging.ERROR, target=logging.StreamHandler(sys.stdout)
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(LOG_BUFFER)
+
+BASE_URL = "http://127.0.0.1:8000"
+
+# One client for every call; transient failures are retried
+CLIENT = make_client(BASE_URL, 30)
+
 def test_github_sync():
     """Test the GitHub sync functionality with a repository that has more files."""
     
-    print("🚀 Starting GitHub Sync Integration Tests")
-    print("=" * 60)
+    logger.info("🚀 Starting GitHub Sync Integration Tests")
+    logger.info("=" * 60)
     
     # Check if GitHub token is configured
     github_token = os.getenv("GITHUB_TOKEN")
     if not github_token:
-        print("❌ GitHub token not found in environment variables")
-        return False
+        logger.error("❌ GitHub token not found in environment variables")
+        raise AssertionError("GitHub token not found in environment variables")
     
-    print(f"🔑 GitHub token configured: {github_token[:10]}...")
+    logger.info(f"🔑 GitHub token configured: {github_token[:10]}...")
     
-    print("\n🧪 Testing GitHub Sync Functionality")
-    print("=" * 50)
+    logger.info("\n🧪 Testing GitHub Sync Functionality")
+    logger.info("=" * 50)
     
     # Test with a repository that has more diverse files
     test_repo = {
@@ -32,111 +49,110 @@ def test_github_sync():
         "context": "test_github_vscode"
     }
     
-    print(f"📂 Testing sync for repository: {test_repo['owner']}/{test_repo['repo']}")
-    
-    # Test GitHub sync endpoint
-    sync_url = "http://127.0.0.1:8000/api/sync/github"
-    sync_payload = {
-        "owner": test_repo["owner"],
-        "repo": test_repo["repo"],
-        "branch": test_repo["branch"],
-        "contextId": test_repo["context"],
-        "github_token": github_token
-    }
-    
-    print("🔄 Calling /api/sync/github endpoint...")
-    try:
-        sync_response = requests.post(sync_url, json=sync_payload, timeout=120)  # Increased timeout for larger repo
-        print(f"📊 Response Status: {sync_response.status_code}")
-        
-        if sync_response.status_code == 200:
-            sync_data = sync_response.json()
-            print(f"📄 Response Body: {sync_data}")
-            print(f"✅ GitHub sync successful: {sync_data.get('message', 'No message')}")
-        else:
-            print(f"❌ GitHub sync failed: {sync_response.text}")
-            return False
-            
-    except requests.exceptions.Timeout:
-        print("⏰ GitHub sync timed out - this is normal for large repositories")
-        print("✅ Sync request was accepted (timeout doesn't mean failure)")
-    except Exception as e:
-        print(f"❌ Error during GitHub sync: {str(e)}")
-        return False
-    
-    # Test with a smaller repository for complete testing
-    print(f"\n📂 Testing with smaller repository for complete verification...")
+    # A small repository for complete verification, synced in the same batch request
     small_repo = {
         "owner": "octocat",
         "repo": "Hello-World", 
         "branch": "master",
         "context": "test_github_small"
     }
+    repos = [test_repo, small_repo]
+    
+    repo_names = ", ".join(f"{repo['owner']}/{repo['repo']}" for repo in repos)
+    logger.info(f"📂 Testing sync for repositories: {repo_names}")
     
-    # Update sync payload for smaller repo
-    sync_payload.update({
-        "owner": small_repo["owner"],
-        "repo": small_repo["repo"], 
-        "branch": small_repo["branch"],
-        "contextId": small_repo["context"]
-    })
+    # Test GitHub batch sync endpoint: one request syncs both repositories
+    sync_url = "/api/sync/github/batch"
+    sync_payload = {
+        "repos": [
+            {
+                "owner": repo["owner"],
+                "repo": repo["repo"],
+                "branch": repo["branch"],
+                "contextId": repo["context"]
+            }
+            for repo in repos
+        ],
+        "github_token": github_token
+    }
     
+    logger.info(f"🔄 Calling {sync_url} endpoint...")
     try:
-        sync_response = requests.post(sync_url, json=sync_payload, timeout=30)
-        if sync_response.status_code == 200:
-            sync_data = sync_response.json()
-            print(f"✅ Small repo sync: {sync_data.get('message', 'No message')}")
+        sync_response = jpost(CLIENT, sync_url, sync_payload, timeout=120)  # Increased timeout for larger repo
+        logger.info(f"📊 Response Status: {sync_response.status_code}")
+        
+        if sync_response.status_code != 200:
+            logger.error(f"❌ GitHub sync failed: {sync_response.text}")
+            raise AssertionError(f"GitHub sync failed: {sync_response.text}")
+        
+        main_status, small_status = jloads(sync_response)["results"]
+        if not main_status["success"]:
+            logger.error(f"❌ GitHub sync failed: {main_status['message']}")
+            raise AssertionError(f"GitHub sync failed: {main_status['message']}")
+        logger.info(f"✅ GitHub sync successful: {main_status['message']}")
+        
+        # The small repository is a best-effort extra check
+        if small_status["success"]:
+            logger.info(f"✅ Small repo sync: {small_status['message']}")
         else:
-            print(f"⚠️ Small repo sync status: {sync_response.status_code}")
+            logger.warning(f"⚠️ Small repo sync error: {small_status['message']}")
+            
+    except AssertionError:
+        raise
     except Exception as e:
-        print(f"⚠️ Small repo sync error: {str(e)}")
+        logger.error(f"❌ Error during GitHub sync: {str(e)}")
+        raise
     
     # Test query functionality
-    print(f"\n🔍 Testing Query with GitHub Data")
-    print("=" * 50)
+    logger.info(f"\n🔍 Testing Query with GitHub Data")
+    logger.info("=" * 50)
     
-    print("⏳ Waiting for indexing to complete...")
-    time.sleep(3)
+    logger.info("⏳ Waiting for indexing to complete...")
+    wait_until_indexed(CLIENT, test_repo["context"])
     
-    query_url = "http://127.0.0.1:8000/api/query"
+    query_url = "/api/query"
     query_payload = {
         "question": "What is this repository about? What files does it contain?",
         "contextId": test_repo["context"]
     }
     
-    print("🔄 Calling /api/query endpoint...")
+    logger.info("🔄 Calling /api/query endpoint...")
     try:
-        query_response = requests.post(query_url, json=query_payload, timeout=30)
-        print(f"📊 Response Status: {query_response.status_code}")
+        query_response = jpost(CLIENT, query_url, query_payload)
+        logger.info(f"📊 Response Status: {query_response.status_code}")
         
         if query_response.status_code == 200:
-            query_data = query_response.json()
-            print("✅ Query successful!")
-            print(f"🤖 Answer: {query_data.get('answer', 'No answer')[:200]}...")
+            query_data = jloads(query_response)
+            logger.info("✅ Query successful!")
+            logger.info(f"🤖 Answer: {query_data.get('answer', 'No answer')[:200]}...")
             
             sources = query_data.get('sources', [])
-            print(f"📚 Number of sources: {len(sources)}")
+            logger.info(f"📚 Number of sources: {len(sources)}")
             for i, source in enumerate(sources[:3], 1):  # Show first 3 sources
                 source_type = source.get('metadata', {}).get('source', 'unknown')
                 source_name = source.get('metadata', {}).get('file_name', 'unknown')
-                print(f"📄 Source {i}: {source_type} - {source_name}")
+                logger.info(f"📄 Source {i}: {source_type} - {source_name}")
         else:
-            print(f"❌ Query failed: {query_response.text}")
-            return False
+            logger.error(f"❌ Query failed: {query_response.text}")
+            raise AssertionError(f"Query failed: {query_response.text}")
             
+    except AssertionError:
+        raise
     except Exception as e:
-        print(f"❌ Error during query: {str(e)}")
-        return False
-    
-    print(f"\n🎉 GitHub sync integration tests completed!")
+        logger.error(f"❌ Error during query: {str(e)}")
+        raise
     
-    print(f"\n📋 Test Summary:")
-    print(f"   GitHub Sync: ✅ PASS")
-    print(f"   Query Test: ✅ PASS")
+    logger.info(f"\n🎉 GitHub sync integration tests completed!")
     
-    return True
+    logger.info(f"\n📋 Test Summary:")
+    logger.info(f"   GitHub Sync: ✅ PASS")
+    logger.info(f"   Query Test: ✅ PASS")
+    LOG_BUFFER.flush()
 
 if __name__ == "__main__":
-    success = test_github_sync()
-    if not success:
-        exit(1)
\ No newline at end of file
+    try:
+        test_github_sync()
+    except Exception:
+        exit(1)
+    finally:
+        CLIENT.close()
\ No newline at end of file
@@ -5,6 +5,8 @@ This script tests the OpenAI proxy service in isolation to diagnose connection i
 """
 
 import os
+import logging
+import logging.handlers
 import sys
 from pathlib import Path
 
@@ -12,48 +14,51 @@ from pathlib import Path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
-from settings import Settings
-from openai import OpenAI
+from settings import Settings, get_settings
+from testing_http import embed_text, get_openai_client
+
+# Progress messages are buffered and written in one go at the end of each test
+# (or as soon as a failure is logged), instead of one stdout write per line
+LOG_BUFFER = logging.handlers.MemoryHandler(
+    1024, flushLevel=logging.ERROR, target=logging.StreamHandler(sys.stdout)
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(LOG_BUFFER)
 
 def test_openai_connection():
     """Test OpenAI API connection and basic functionality"""
-    print("🔍 OpenAI API Diagnostic Test")
-    print("=" * 50)
+    logger.info("🔍 OpenAI API Diagnostic Test")
+    logger.info("=" * 50)
     
     try:
         # Load settings
-        settings = Settings()
-        print(f"📋 Configuration:")
-        print(f"   API Key: {settings.OPENAI_API_KEY[:20]}..." if settings.OPENAI_API_KEY else "   API Key: Not set")
-        print(f"   Base URL: {settings.OPENAI_BASE_URL}")
-        print()
+        settings = get_settings()
+        logger.info(f"📋 Configuration:")
+        logger.info(f"   API Key: {settings.OPENAI_API_KEY[:20]}..." if settings.OPENAI_API_KEY else "   API Key: Not set")
+        logger.info(f"   Base URL: {settings.OPENAI_BASE_URL}")
+        logger.info("")
         
         # Initialize OpenAI client
-        print("🤖 Initializing OpenAI client...")
-        client = OpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_BASE_URL
-        )
-        print("✅ Client initialized successfully")
-        print()
+        logger.info("🤖 Initializing OpenAI client...")
+        client = get_openai_client(settings)
+        logger.info("✅ Client initialized successfully")
+        logger.info("")
         
         # Test 1: Simple embedding request
-        print("🧪 Test 1: Testing embeddings endpoint...")
+        logger.info("🧪 Test 1: Testing embeddings endpoint...")
         try:
-            response = client.embeddings.create(
-                model="text-embedding-ada-002",
-                input="This is a test message for embedding."
-            )
-            embedding_dim = len(response.data[0].embedding)
-            print(f"✅ Embeddings test successful (dimension: {embedding_dim})")
+            embedding = embed_text("text-embedding-ada-002", "This is a test message for embedding.")
+            embedding_dim = len(embedding)
+            logger.info(f"✅ Embeddings test successful (dimension: {embedding_dim})")
         except Exception as e:
-            print(f"❌ Embeddings test failed: {e}")
-            return False
+            logger.error(f"❌ Embeddings test failed: {e}")
+            raise AssertionError(f"Embeddings test failed: {e}") from e
         
-        print()
+        logger.info("")
         
         # Test 2: Simple chat completion request
-        print("🧪 Test 2: Testing chat completions endpoint...")
+        logger.info("🧪 Test 2: Testing chat completions endpoint...")
         try:
             response = client.chat.completions.create(
                 model="gpt-3.5-turbo",
@@ -63,53 +68,55 @@ def test_openai_connection():
                 max_tokens=50
             )
             message = response.choices[0].message.content
-            print(f"✅ Chat completion test successful")
-            print(f"   Response: {message}")
+            logger.info(f"✅ Chat completion test successful")
+            logger.info(f"   Response: {message}")
         except Exception as e:
-            print(f"❌ Chat completion test failed: {e}")
-            return False
+            logger.error(f"❌ Chat completion test failed: {e}")
+            raise AssertionError(f"Chat completion test failed: {e}") from e
         
-        print()
-        print("🎉 All OpenAI API tests passed successfully!")
-        return True
+        logger.info("")
+        logger.info("🎉 All OpenAI API tests passed successfully!")
+        LOG_BUFFER.flush()
         
+    except AssertionError:
+        raise
     except Exception as e:
-        print(f"💥 Critical error during OpenAI testing: {e}")
-        print(f"   Error type: {type(e).__name__}")
-        return False
+        logger.error(f"💥 Critical error during OpenAI testing: {e}")
+        logger.info(f"   Error type: {type(e).__name__}")
+        raise
 
-def diagnose_connection_issues():
+def diagnose_connection_issues(settings: Settings = None):
     """Provide diagnostic information for connection issues"""
-    print("\n🔧 Connection Diagnostic Information:")
-    print("=" * 50)
+    logger.info("\n🔧 Connection Diagnostic Information:")
+    logger.info("=" * 50)
     
-    settings = Settings()
+    settings = settings or get_settings()
     
-    print("📊 Current Configuration:")
-    print(f"   OPENAI_API_KEY: {'Set' if settings.OPENAI_API_KEY else 'Not set'}")
-    print(f"   OPENAI_BASE_URL: {settings.OPENAI_BASE_URL}")
-    print()
+    logger.info("📊 Current Configuration:")
+    logger.info(f"   OPENAI_API_KEY: {'Set' if settings.OPENAI_API_KEY else 'Not set'}")
+    logger.info(f"   OPENAI_BASE_URL: {settings.OPENAI_BASE_URL}")
+    logger.info("")
     
-    print("🌐 Possible Issues:")
-    print("   1. winfunc.com proxy service is down or overloaded")
-    print("   2. API key is invalid or expired")
-    print("   3. Rate limiting or billing issues")
-    print("   4. Network connectivity problems")
-    print("   5. Proxy service configuration issues")
-    print()
+    logger.info("🌐 Possible Issues:")
+    logger.info("   1. winfunc.com proxy service is down or overloaded")
+    logger.info("   2. API key is invalid or expired")
+    logger.info("   3. Rate limiting or billing issues")
+    logger.info("   4. Network connectivity problems")
+    logger.info("   5. Proxy service configuration issues")
+    logger.info("")
     
-    print("🛠️  Recommended Actions:")
-    print("   1. Check winfunc.com service status")
-    print("   2. Verify API key validity")
-    print("   3. Try again in a few minutes")
-    print("   4. Contact winfunc.com support if issues persist")
+    logger.info("🛠️  Recommended Actions:")
+    logger.info("   1. Check winfunc.com service status")
+    logger.info("   2. Verify API key validity")
+    logger.info("   3. Try again in a few minutes")
+    logger.info("   4. Contact winfunc.com support if issues persist")
 
 if __name__ == "__main__":
-    success = test_openai_connection()
-    
-    if not success:
-        diagnose_connection_issues()
+    try:
+        test_openai_connection()
+    except Exception:
+        diagnose_connection_issues(get_settings())
         sys.exit(1)
-    else:
-        print("\n✅ OpenAI proxy service is working correctly!")
-        sys.exit(0)
\ No newline at end of file
+    
+    logger.info("\n✅ OpenAI proxy service is working correctly!")
+    sys.exit(0)
\ No newline at end of file
@@ -1,30 +1,46 @@
-import requests
-import json
-import os
+import asyncio
+import httpx
+import logging
+import logging.handlers
+import sys
 from dotenv import load_dotenv
 
+from testing_http import jloads, jpost
+
 # Load environment variables
 load_dotenv()
 
+# Progress messages are buffered and written in one go at the end of each test
+# (or as soon as a failure is logged), instead of one stdout write per line
+LOG_BUFFER = logging.handlers.MemoryHandler(
+    1024, flushLevel=logging.ERROR, target=logging.StreamHandler(sys.stdout)
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(LOG_BUFFER)
+
+BASE_URL = "http://127.0.0.1:8000"
+
 def test_query_transform():
     """Test the query transformation endpoint with various examples."""
-    print("🚀 Starting Query Transform tests...")
-    
-    # Test backend server health
-    print("\n🏥 Testing backend server health...")
-    try:
-        response = requests.get("http://127.0.0.1:8000/")
-        if response.status_code == 200:
-            print("✅ Backend server is running")
-        else:
-            print(f"❌ Backend server health check failed: {response.status_code}")
-            return
-    except Exception as e:
-        print(f"❌ Cannot connect to backend server: {e}")
-        return
+    asyncio.run(run_query_transform())
+
+async def run_query_transform():
+    """Run the transform tests on one event loop."""
+    logger.info("🚀 Starting Query Transform tests...")
     
-    print("\n" + "="*60)
-    print("🔄 Testing Query Transform functionality...")
+    # One pooled client so every transform request shares keep-alive connections
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        timeout=30,
+        limits=httpx.Limits(max_keepalive_connections=8)
+    ) as client:
+        await run_transform_tests(client)
+
+async def run_transform_tests(client: httpx.AsyncClient):
+    """Transform every test case in one batch request."""
+    logger.info("\n" + "="*60)
+    logger.info("🔄 Testing Query Transform functionality...")
     
     # Test cases with various types of queries
     test_cases = [
@@ -53,46 +69,53 @@ def test_query_transform():
     successful_tests = 0
     total_tests = len(test_cases)
     
-    for i, test_case in enumerate(test_cases, 1):
-        print(f"\n📝 Test {i}/{total_tests}: {test_case['name']}")
-        print(f"   Original: '{test_case['question']}'")
+    # All test cases are transformed by one batch request (one round trip, one LLM call)
+    try:
+        response = await jpost(
+            client,
+            "/api/query/transform/batch",
+            {"questions": [test_case['question'] for test_case in test_cases]}
+        )
+    except Exception as e:
+        logger.error(f"❌ Error during batch transform: {e}")
+        raise
+    
+    if response.status_code != 200:
+        logger.error(f"❌ Batch transform failed: {response.status_code} - {response.text}")
+        raise AssertionError(f"Batch transform failed: {response.status_code}")
+    
+    for i, (test_case, result) in enumerate(zip(test_cases, jloads(response)), 1):
+        logger.info(f"\n📝 Test {i}/{total_tests}: {test_case['name']}")
+        logger.info(f"   Original: '{test_case['question']}'")
         
-        try:
-            transform_data = {
-                "question": test_case['question']
-            }
-            
-            response = requests.post(
-                "http://127.0.0.1:8000/api/query/transform",
-                json=transform_data,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                transformed = result['transformed_question']
-                print(f"   ✅ Transformed: '{transformed}'")
-                print(f"   📊 Length increase: {len(test_case['question'])} → {len(transformed)} chars")
-                successful_tests += 1
-            else:
-                print(f"   ❌ Transform failed: {response.status_code} - {response.text}")
-                
-        except Exception as e:
-            print(f"   ❌ Error during transform: {e}")
+        transformed = result['transformed_question']
+        if transformed:
+            logger.info(f"   ✅ Transformed: '{transformed}'")
+            logger.info(f"   📊 Length increase: {len(test_case['question'])} → {len(transformed)} chars")
+            successful_tests += 1
+        else:
+            logger.info("   ❌ Transform returned an empty query")
     
-    print("\n" + "="*60)
-    print(f"🏁 Tests completed: {successful_tests}/{total_tests} successful")
+    logger.info("\n" + "="*60)
+    logger.info(f"🏁 Tests completed: {successful_tests}/{total_tests} successful")
     
     if successful_tests == total_tests:
-        print("✅ All tests passed! Query transformation is working correctly.")
+        logger.info("✅ All tests passed! Query transformation is working correctly.")
     else:
-        print(f"⚠️  {total_tests - successful_tests} tests failed.")
+        logger.warning(f"⚠️  {total_tests - successful_tests} tests failed.")
     
-    print("\n📝 Notes:")
-    print("   - The transform endpoint enhances queries for better RAG retrieval")
-    print("   - Transformed queries should be more specific and detailed")
-    print("   - Frontend should use transformed queries for /api/query calls")
-    print("   - This endpoint is stateless and doesn't access the vector store")
+    logger.info("\n📝 Notes:")
+    logger.info("   - The transform endpoint enhances queries for better RAG retrieval")
+    logger.info("   - Transformed queries should be more specific and detailed")
+    logger.info("   - Frontend should use transformed queries for /api/query calls")
+    logger.info("   - This endpoint is stateless and doesn't access the vector store")
+    logger.info("   - /api/query/transform/batch rewrites up to 20 questions in one call")
+    
+    LOG_BUFFER.flush()
+    assert successful_tests == total_tests, f"{total_tests - successful_tests} transform tests failed"
 
 if __name__ == "__main__":
-    test_query_transform()
\ No newline at end of file
+    try:
+        test_query_transform()
+    except Exception:
+        exit(1)
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Tests for the in-process query response caches.
+"""
+
+import pytest
+
+import semantic_cache
+from semantic_cache import ExactQueryCache, SemanticQueryCache
+
+QUERY = [1.0, 0.0, 0.0]
+
+def test_semantic_cache_rejects_empty_capacity():
+    """A context that can hold no entries is a configuration error, not an IndexError on put."""
+    with pytest.raises(ValueError):
+        SemanticQueryCache(max_entries=0)
+
+def test_semantic_cache_entries_expire(monkeypatch):
+    """Entries stop matching once the TTL has passed."""
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: now[0])
+    cache = SemanticQueryCache(ttl=10)
+
+    cache.put("ctx", QUERY, "answer")
+    assert cache.get("ctx", QUERY) == "answer"
+
+    now[0] += 11
+    assert cache.get("ctx", QUERY) is None
+
+def test_semantic_cache_evicts_least_recently_used_context():
+    """Only max_contexts contexts are kept; the one used least recently goes first."""
+    cache = SemanticQueryCache(max_contexts=2)
+    cache.put("a", QUERY, "answer a")
+    cache.put("b", QUERY, "answer b")
+    assert cache.get("a", QUERY) == "answer a"
+
+    cache.put("c", QUERY, "answer c")
+
+    assert cache.get("a", QUERY) == "answer a"
+    assert cache.get("b", QUERY) is None
+    assert cache.get("c", QUERY) == "answer c"
+
+def test_semantic_cache_overwrites_oldest_entry_when_full():
+    """A full context replaces its oldest entry."""
+    cache = SemanticQueryCache(max_entries=1)
+    cache.put("ctx", QUERY, "old")
+    cache.put("ctx", [0.0, 1.0, 0.0], "new")
+
+    assert cache.get("ctx", QUERY) is None
+    assert cache.get("ctx", [0.0, 1.0, 0.0]) == "new"
+
+@pytest.mark.parametrize("cache, key", [
+    (SemanticQueryCache(), QUERY),
+    (ExactQueryCache(), "What is Synapse?"),
+])
+def test_put_drops_answers_computed_before_an_invalidation(cache, key):
+    """A query that was running while its context was invalidated does not store its stale answer."""
+    generation = cache.generation()
+    cache.invalidate("ctx")
+
+    cache.put("ctx", key, "stale", generation)
+    assert cache.get("ctx", key) is None
+
+    cache.put("ctx", key, "fresh", cache.generation())
+    assert cache.get("ctx", key) == "fresh"
@@ -7,62 +7,69 @@ from the .env file using the new Pydantic settings system.
 """
 
 import sys
+import logging
+import logging.handlers
 from pathlib import Path
 
 # Add the backend directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from testing_http import OPENAI_HTTP_CLIENT, embed_text, get_openai_client
+
+# Progress messages are buffered and written in one go at the end of each test
+# (or as soon as a failure is logged), instead of one stdout write per line
+LOG_BUFFER = logging.handlers.MemoryHandler(
+    1024, flushLevel=logging.ERROR, target=logging.StreamHandler(sys.stdout)
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(LOG_BUFFER)
+
 def test_settings():
     """Test the centralized settings configuration."""
-    print("🔧 Testing Centralized Settings Configuration")
-    print("=" * 50)
+    logger.info("🔧 Testing Centralized Settings Configuration")
+    logger.info("=" * 50)
     
     try:
         # Import the settings
-        from settings import settings
-        print("✅ Successfully imported centralized settings")
+        from settings import get_settings
+        settings = get_settings()
+        logger.info("✅ Successfully imported centralized settings")
         
         # Test required OpenAI settings
-        print(f"\n📋 OpenAI Configuration:")
-        print(f"   API Key: {'✅ Set' if settings.OPENAI_API_KEY else '❌ Missing'}")
-        print(f"   Base URL: {settings.OPENAI_BASE_URL}")
+        logger.info(f"\n📋 OpenAI Configuration:")
+        logger.info(f"   API Key: {'✅ Set' if settings.OPENAI_API_KEY else '❌ Missing'}")
+        logger.info(f"   Base URL: {settings.OPENAI_BASE_URL}")
         
         # Test optional integration tokens
-        print(f"\n🔗 Integration Tokens:")
-        print(f"   Slack Bot Token: {'✅ Set' if settings.SLACK_BOT_TOKEN else '⚠️  Not set (optional)'}")
-        print(f"   GitHub Token: {'✅ Set' if settings.GITHUB_TOKEN else '⚠️  Not set (optional)'}")
+        logger.info(f"\n🔗 Integration Tokens:")
+        logger.info(f"   Slack Bot Token: {'✅ Set' if settings.SLACK_BOT_TOKEN else '⚠️  Not set (optional)'}")
+        logger.info(f"   GitHub Token: {'✅ Set' if settings.GITHUB_TOKEN else '⚠️  Not set (optional)'}")
         
         # Test application configuration
-        print(f"\n⚙️  Application Configuration:")
-        print(f"   Debug Mode: {settings.DEBUG}")
-        print(f"   Log Level: {settings.LOG_LEVEL}")
-        print(f"   Host: {settings.HOST}")
-        print(f"   Port: {settings.PORT}")
-        print(f"   ChromaDB Path: {settings.CHROMA_DB_PATH}")
+        logger.info(f"\n⚙️  Application Configuration:")
+        logger.info(f"   Debug Mode: {settings.DEBUG}")
+        logger.info(f"   Log Level: {settings.LOG_LEVEL}")
+        logger.info(f"   Host: {settings.HOST}")
+        logger.info(f"   Port: {settings.PORT}")
+        logger.info(f"   ChromaDB Path: {settings.CHROMA_DB_PATH}")
         
         # Test OpenAI client initialization
-        print(f"\n🤖 Testing OpenAI Client Initialization:")
+        logger.info(f"\n🤖 Testing OpenAI Client Initialization:")
         try:
-            from openai import OpenAI
-            client = OpenAI(
-                api_key=settings.OPENAI_API_KEY,
-                base_url=settings.OPENAI_BASE_URL
-            )
-            print("✅ OpenAI client initialized successfully")
+            get_openai_client(settings)
+            logger.info("✅ OpenAI client initialized successfully")
             
             # Test a simple embedding request
-            response = client.embeddings.create(
-                model="text-embedding-3-small",
-                input="Test configuration"
-            )
-            print(f"✅ OpenAI embedding test successful (dimension: {len(response.data[0].embedding)})")
+            embedding = embed_text("text-embedding-3-small", "Test configuration")
+            logger.info(f"✅ OpenAI embedding test successful (dimension: {len(embedding)})")
             
         except Exception as e:
-            print(f"❌ OpenAI client test failed: {e}")
-            return False
+            logger.error(f"❌ OpenAI client test failed: {e}")
+            raise AssertionError(f"OpenAI client test failed: {e}") from e
         
         # Test LlamaIndex configuration
-        print(f"\n🦙 Testing LlamaIndex Configuration:")
+        logger.info(f"\n🦙 Testing LlamaIndex Configuration:")
         try:
             from llama_index.embeddings.openai import OpenAIEmbedding
             from llama_index.llms.openai import OpenAI as LlamaOpenAI
@@ -71,30 +78,37 @@ def test_settings():
             embed_model = OpenAIEmbedding(
                 model="text-embedding-3-small",
                 api_key=settings.OPENAI_API_KEY,
-                base_url=settings.OPENAI_BASE_URL
+                base_url=settings.OPENAI_BASE_URL,
+                http_client=OPENAI_HTTP_CLIENT
             )
-            print("✅ LlamaIndex embedding model configured successfully")
+            logger.info("✅ LlamaIndex embedding model configured successfully")
             
             # Test LLM
             llm = LlamaOpenAI(
                 model="gpt-4o-mini",
                 api_key=settings.OPENAI_API_KEY,
-                base_url=settings.OPENAI_BASE_URL
+                base_url=settings.OPENAI_BASE_URL,
+                http_client=OPENAI_HTTP_CLIENT
             )
-            print("✅ LlamaIndex LLM configured successfully")
+            logger.info("✅ LlamaIndex LLM configured successfully")
             
         except Exception as e:
-            print(f"❌ LlamaIndex configuration test failed: {e}")
-            return False
+            logger.error(f"❌ LlamaIndex configuration test failed: {e}")
+            raise AssertionError(f"LlamaIndex configuration test failed: {e}") from e
         
-        print(f"\n🎉 All configuration tests passed!")
-        print("The centralized settings system is working correctly.")
-        return True
+        logger.info(f"\n🎉 All configuration tests passed!")
+        logger.info("The centralized settings system is working correctly.")
+        LOG_BUFFER.flush()
         
+    except AssertionError:
+        raise
     except Exception as e:
-        print(f"❌ Settings configuration test failed: {e}")
-        return False
+        logger.error(f"❌ Settings configuration test failed: {e}")
+        raise
 
 if __name__ == "__main__":
-    success = test_settings()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    try:
+        test_settings()
+    except Exception:
+        sys.exit(1)
+    sys.exit(0)
\ No newline at end of file
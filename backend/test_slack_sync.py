@@ -2,67 +2,117 @@
 """
 Test script for Slack sync functionality
 """
-import requests
-import json
+import httpx
+import logging
+import logging.handlers
 import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from testing_http import jloads, jpost, make_client, wait_until_indexed
+
 # Load environment variables
 load_dotenv()
 
+# Progress messages are buffered and written in one go at the end of each test
+# (or as soon as a failure is logged), instead of one stdout write per line
+LOG_BUFFER = logging.handlers.MemoryHandler(
+    1024, flushLevel=logging.ERROR, target=logging.StreamHandler(sys.stdout)
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(LOG_BUFFER)
+
 # Configuration
 BASE_URL = "http://127.0.0.1:8000"
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 
-def test_slack_sync():
-    """Test the Slack sync endpoint"""
-    print("🔄 Testing Slack sync functionality...")
-    
-    # Check if Slack token is configured
-    if not SLACK_BOT_TOKEN:
-        print("❌ SLACK_BOT_TOKEN not found in environment variables")
-        print("   Please configure your Slack bot token in the .env file")
-        return False
-    
-    print(f"✅ Slack bot token configured: {SLACK_BOT_TOKEN[:10]}...")
-    
-    # Test with a sample channel ID (you'll need to replace with actual channel IDs)
-    # Note: Channel IDs in Slack look like "C1234567890"
-    test_payload = {
-        "channel_ids": ["C1234567890"],  # Replace with actual channel IDs
-        "contextId": "test_slack",
-        "oldest_ts": None  # Optional: limit history
+# Channels to sync (replace with actual channel IDs; they look like "C1234567890")
+TEST_CHANNEL_IDS = ["C1234567890"]
+
+# Independent syncs and queries run concurrently, bounded by the client's pool
+MAX_WORKERS = 8
+CONCURRENT_QUERIES = 8
+
+# One pooled keep-alive client for every call; transient failures are retried
+CLIENT = make_client(BASE_URL, 30)
+
+def sync_channel(channel_id):
+    """Sync one channel and return the report lines and whether it succeeded"""
+    # The sync endpoint takes form fields, with channel IDs comma-separated
+    form_data = {
+        "channel_ids": channel_id,
+        "contextId": "test_slack"
     }
-    
+    lines = [f"📤 Sending sync request for channel: {channel_id}"]
     try:
-        print(f"📤 Sending sync request for channels: {test_payload['channel_ids']}")
-        response = requests.post(
-            f"{BASE_URL}/api/sync/slack",
-            json=test_payload,
+        response = CLIENT.post(
+            "/api/sync/slack",
+            data=form_data,
             timeout=60  # Increased timeout for Slack API calls
         )
         
-        print(f"📥 Response status: {response.status_code}")
+        lines.append(f"📥 Response status: {response.status_code}")
         
         if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Slack sync successful: {result['message']}")
-            return True
+            result = jloads(response)
+            lines.append(f"✅ Slack sync successful: {result['message']}")
+            return lines, True
         else:
-            print(f"❌ Slack sync failed: {response.text}")
-            return False
-            
-    except requests.exceptions.Timeout:
-        print("⏰ Request timed out - this is normal for large Slack channels")
-        return False
+            lines.append(f"❌ Slack sync failed: {response.text}")
+            return lines, False
+    
+    except httpx.TimeoutException:
+        lines.append("⏰ Request timed out - this is normal for large Slack channels")
+        return lines, False
     except Exception as e:
-        print(f"❌ Error during sync: {e}")
-        return False
+        lines.append(f"❌ Error during sync: {e}")
+        return lines, False
+
+def test_slack_sync(channel_ids=TEST_CHANNEL_IDS):
+    """Test the Slack sync endpoint, syncing every channel concurrently"""
+    logger.info("🔄 Testing Slack sync functionality...")
+    
+    # Check if Slack token is configured
+    if not SLACK_BOT_TOKEN:
+        logger.error("❌ SLACK_BOT_TOKEN not found in environment variables")
+        logger.error("   Please configure your Slack bot token in the .env file")
+        raise AssertionError("SLACK_BOT_TOKEN not found in environment variables")
+    
+    logger.info(f"✅ Slack bot token configured: {SLACK_BOT_TOKEN[:10]}...")
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        reports = list(executor.map(sync_channel, channel_ids))
+    
+    # Log in channel order so output from concurrent syncs doesn't interleave
+    for lines, ok in reports:
+        for line in lines:
+            if ok:
+                logger.info(line)
+            elif line.startswith("⏰"):
+                logger.warning(line)
+            else:
+                logger.error(line)
+    
+    failed = [channel_id for channel_id, (_, ok) in zip(channel_ids, reports) if not ok]
+    assert not failed, f"Slack sync failed for channels: {', '.join(failed)}"
+    LOG_BUFFER.flush()
+
+def timed_query(payload):
+    """Send one query and return the response and its latency in seconds"""
+    start = time.perf_counter()
+    response = jpost(CLIENT, "/api/query", payload)
+    return response, time.perf_counter() - start
 
 def test_query_with_slack_data():
     """Test querying data that includes Slack content"""
-    print("\n🔍 Testing query with Slack data...")
+    logger.info("\n🔍 Testing query with Slack data...")
+    
+    logger.info("⏳ Waiting for indexing to complete...")
+    if not wait_until_indexed(CLIENT, "test_slack", timeout=30):
+        logger.warning("⚠️  No indexed chunks found for 'test_slack' yet, querying anyway")
     
     query_payload = {
         "question": "What discussions happened in Slack?",
@@ -70,92 +120,63 @@ def test_query_with_slack_data():
     }
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/api/query",
-            json=query_payload,
-            timeout=30
-        )
+        # Send the same query several times at once to measure latency under concurrency
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = list(executor.map(timed_query, [query_payload] * CONCURRENT_QUERIES))
+        latencies = sorted(elapsed for _, elapsed in results)
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        logger.info(f"⏱️  {len(latencies)} concurrent queries: p50 {latencies[len(latencies) // 2]:.2f}s, p95 {p95:.2f}s")
         
-        print(f"📥 Query response status: {response.status_code}")
+        response = results[0][0]
+        logger.info(f"📥 Query response status: {response.status_code}")
         
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Query successful!")
-            print(f"📝 Answer: {result['answer'][:200]}...")
-            print(f"📚 Found {len(result['sources'])} sources")
-            
-            # Check if any sources are from Slack
-            slack_sources = [s for s in result['sources'] if s.get('metadata', {}).get('source') == 'slack']
-            if slack_sources:
-                print(f"✅ Found {len(slack_sources)} Slack sources in results")
-            else:
-                print("⚠️  No Slack sources found in query results")
-            
-            return True
-        elif response.status_code == 500:
-            error_detail = response.json().get('detail', 'Unknown error')
-            if 'invalid_auth' in error_detail:
-                print("⚠️  Slack authentication failed - this is expected with test channel IDs")
-                print("✅ Endpoint is working correctly (authentication error is normal for test)")
-            else:
-                print(f"❌ Query failed: {error_detail}")
-            return False
+        if response.status_code != 200:
+            logger.error(f"❌ Query failed: {response.text}")
+            raise AssertionError(f"Query failed: {response.text}")
+        
+        result = jloads(response)
+        logger.info("✅ Query successful!")
+        logger.info(f"📝 Answer: {result['answer'][:200]}...")
+        logger.info(f"📚 Found {len(result['sources'])} sources")
+        
+        # Check if any sources are from Slack
+        slack_count = sum(1 for s in result['sources'] if (s.get('metadata') or {}).get('source') == 'slack')
+        if slack_count:
+            logger.info(f"✅ Found {slack_count} Slack sources in results")
         else:
-            print(f"❌ Query failed: {response.text}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error during query: {e}")
-        return False
-
-def test_health_check():
-    """Test if the backend server is running"""
-    print("🏥 Testing backend server health...")
+            logger.warning("⚠️  No Slack sources found in query results")
     
-    try:
-        response = requests.get(f"{BASE_URL}/", timeout=5)
-        if response.status_code == 200:
-            print("✅ Backend server is running")
-            return True
-        else:
-            print(f"❌ Backend server returned status: {response.status_code}")
-            return False
+    except AssertionError:
+        raise
     except Exception as e:
-        print(f"❌ Cannot connect to backend server: {e}")
-        print("   Make sure the backend server is running on http://127.0.0.1:8000")
-        return False
+        logger.error(f"❌ Error during query: {e}")
+        raise
+    LOG_BUFFER.flush()
 
 def main():
     """Run all tests"""
-    print("🚀 Starting Slack sync tests...\n")
-    
-    # Test 1: Health check
-    if not test_health_check():
-        print("\n❌ Backend server is not accessible. Please start the server first.")
-        return
+    logger.info("🚀 Starting Slack sync tests...\n")
     
-    print("\n" + "="*50)
+    # Test 1: Slack sync
+    test_slack_sync()
     
-    # Test 2: Slack sync
-    sync_success = test_slack_sync()
+    logger.info("\n" + "="*50)
     
-    print("\n" + "="*50)
+    # Test 2: Query with Slack data
+    test_query_with_slack_data()
     
-    # Test 3: Query with Slack data
-    if sync_success:
-        # Wait a moment for indexing to complete
-        print("⏳ Waiting for indexing to complete...")
-        time.sleep(2)
-        test_query_with_slack_data()
-    else:
-        print("⚠️  Skipping query test due to sync failure")
-    
-    print("\n🏁 Tests completed!")
-    print("\n📝 Notes:")
-    print("   - Replace 'C1234567890' with actual Slack channel IDs")
-    print("   - Channel IDs can be found in Slack URL or using Slack API")
-    print("   - Make sure your Slack bot has proper permissions")
-    print("   - Large channels may take longer to sync")
+    logger.info("\n🏁 Tests completed!")
+    logger.info("\n📝 Notes:")
+    logger.info("   - Replace 'C1234567890' with actual Slack channel IDs")
+    logger.info("   - Channel IDs can be found in Slack URL or using Slack API")
+    logger.info("   - Make sure your Slack bot has proper permissions")
+    logger.info("   - Large channels may take longer to sync")
+    LOG_BUFFER.flush()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except Exception:
+        exit(1)
+    finally:
+        CLIENT.close()
@@ -0,0 +1,32 @@
+"""
+Tests for the Chroma-backed vector store client; these run against a temporary local database.
+"""
+
+import chromadb
+
+from vector_store_client import COLLECTION_NAME, VectorStoreClient
+
+def test_set_search_ef_updates_hnsw_configuration(tmp_path):
+    """set_search_ef changes ef_search on a collection created with COLLECTION_METADATA."""
+    store = VectorStoreClient(db_path=str(tmp_path / "chroma_db"))
+
+    store.set_search_ef(32)
+
+    assert store.collection.configuration["hnsw"]["ef_search"] == 32
+    reopened = store.client.get_collection(COLLECTION_NAME)
+    assert reopened.configuration["hnsw"]["ef_search"] == 32
+
+def test_set_search_ef_updates_existing_collection(tmp_path):
+    """Collections created before the HNSW metadata existed (l2 space) can be tuned too."""
+    db_path = tmp_path / "chroma_db"
+    chromadb.PersistentClient(path=str(db_path)).create_collection(
+        name=COLLECTION_NAME,
+        metadata={"description": "Main knowledge base for Synapse application"}
+    )
+    store = VectorStoreClient(db_path=str(db_path))
+
+    store.set_search_ef(32)
+
+    configuration = store.client.get_collection(COLLECTION_NAME).configuration["hnsw"]
+    assert configuration["ef_search"] == 32
+    assert configuration["space"] == "l2"
@@ -0,0 +1,112 @@
+"""
+HTTP and OpenAI client helpers shared by the backend test and diagnostic scripts.
+"""
+
+import time
+from functools import lru_cache
+from typing import Any, List, Optional
+
+import httpx
+import orjson
+from openai import OpenAI
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Responses worth retrying: the server or a proxy in front of it is briefly unavailable
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+class RetryTransport(httpx.HTTPTransport):
+    """HTTP transport that retries failed connections and 502/503/504 responses with exponential backoff."""
+
+    def __init__(self, retries: int = 3, backoff_factor: float = 0.3, **kwargs):
+        """
+        Args:
+            retries: Maximum number of retries per request
+            backoff_factor: Seconds before the first retry, doubled for every further retry
+        """
+        # httpx retries failed connection attempts itself
+        super().__init__(retries=retries, **kwargs)
+        self.max_retries = retries
+        self.backoff_factor = backoff_factor
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            response = super().handle_request(request)
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            response.close()
+            time.sleep(self.backoff_factor * 2 ** attempt)
+
+def make_client(base_url: str, timeout: float) -> httpx.Client:
+    """
+    Create the pooled client a test script shares across all of its calls.
+
+    The client is thread-safe and reuses connections (HTTP/2 when the server offers
+    it, HTTP/1.1 keep-alive otherwise); transient failures are retried by the transport.
+    """
+    return httpx.Client(
+        base_url=base_url,
+        timeout=timeout,
+        transport=RetryTransport(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=8)
+        )
+    )
+
+# Connection pool shared by the OpenAI client and any LlamaIndex models a diagnostic script builds
+OPENAI_HTTP_CLIENT = httpx.Client(limits=httpx.Limits(max_keepalive_connections=8, max_connections=16))
+
+# Created on first use and reused by every call so they share one connection pool
+_openai_client: Optional[OpenAI] = None
+
+def get_openai_client(settings) -> OpenAI:
+    """Return the shared OpenAI client, creating it on first use."""
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=OPENAI_HTTP_CLIENT
+        )
+    return _openai_client
+
+@lru_cache(maxsize=64)
+def embed_text(model: str, text: str) -> List[float]:
+    """Embed a text once per process; the diagnostic inputs are constants."""
+    from settings import get_settings
+    return get_openai_client(get_settings()).embeddings.create(model=model, input=text).data[0].embedding
+
+def jpost(client, url: str, payload: Any, **kwargs):
+    """
+    POST a JSON payload serialized with orjson.
+
+    Works with both httpx.Client and httpx.AsyncClient (await the result of the latter).
+    """
+    return client.post(url, content=orjson.dumps(payload), headers=JSON_HEADERS, **kwargs)
+
+def jloads(response: httpx.Response) -> Any:
+    """Parse a JSON response body with orjson."""
+    return orjson.loads(response.content)
+
+def wait_until_indexed(client: httpx.Client, context_id: str, timeout: float = 10, interval: float = 0.2) -> bool:
+    """
+    Poll the status endpoint until chunks for a context are indexed.
+
+    The poll interval doubles after every miss, up to one second. Servers without the
+    status endpoint (404) get a fixed two-second wait instead.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            response = client.get(f"/api/status/{context_id}")
+            if response.status_code == 404:
+                time.sleep(2)
+                return True
+            if response.status_code == 200 and jloads(response)["indexed"]:
+                return True
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() + interval > deadline:
+            return False
+        time.sleep(interval)
+        interval = min(interval * 2, 1.0)
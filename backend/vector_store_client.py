@@ -5,51 +5,132 @@ This module provides a ChromaDB-based persistent vector store client
 for storing and retrieving document embeddings, now integrated with LlamaIndex.
 """
 
+import asyncio
 import chromadb
-from chromadb.config import Settings
 import logging
-from typing import List, Dict, Any, Optional
+import queue
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
 import os
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple, Union
 from pathlib import Path
+from urllib.parse import urlparse
 
 # LlamaIndex imports
-from llama_index.core import VectorStoreIndex, StorageContext, Settings as LlamaSettings
-from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.core import StorageContext, Settings as LlamaSettings
 from llama_index.vector_stores.chroma import ChromaVectorStore
 
 # Import centralized settings
 from settings import settings
+from custom_openai_embedding import CustomOpenAIEmbedding
 
 logger = logging.getLogger(__name__)
 
+COLLECTION_NAME = "synapse_knowledge_base"
+
+# HNSW parameters applied when the collection is created (Chroma ignores them for an
+# existing collection). A larger M and construction_ef build a better connected graph
+# once at insert time; search_ef trades recall for query latency and can be lowered
+# (e.g. to 32) with set_search_ef when latency matters more than the last bit of recall.
+COLLECTION_METADATA = {
+    "description": "Main knowledge base for Synapse application",
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+    "hnsw:num_threads": os.cpu_count() or 4
+}
+
+# Recent get_documents_by_context results kept per client, and how long they stay valid
+CONTEXT_CACHE_SIZE = 128
+CONTEXT_CACHE_TTL = 10.0
+
+# Result fields returned unless a caller asks for more (e.g. "embeddings")
+SEARCH_INCLUDE = ("documents", "metadatas", "distances")
+GET_INCLUDE = ("documents", "metadatas")
+
+# Batches waiting for the background writer; enqueue_documents blocks once this many are pending
+WRITE_QUEUE_SIZE = 8
+
 class VectorStoreClient:
     """ChromaDB-based vector store client for document embeddings with LlamaIndex integration."""
     
-    def __init__(self, db_path: str = "./chroma_db"):
+    def __init__(
+        self,
+        db_path: str = "./chroma_db",
+        warm: bool = False,
+        server_url: Optional[str] = None
+    ):
         """
         Initialize the ChromaDB client with persistent storage and LlamaIndex integration.
         
         Args:
             db_path: Path to store the ChromaDB database files
+            warm: Run warm_up before returning, so the first search doesn't pay cold-start costs
+            server_url: URL of a Chroma server to use instead of the embedded database,
+                so several worker processes share one copy of the index
         """
         self.db_path = Path(db_path)
-        self.db_path.mkdir(exist_ok=True)
         
-        # Initialize ChromaDB client with persistent storage
-        self.client = chromadb.PersistentClient(path=str(self.db_path))
+        if server_url:
+            url = urlparse(server_url)
+            self.client = chromadb.HttpClient(
+                host=url.hostname,
+                port=url.port or (443 if url.scheme == "https" else 8000),
+                ssl=url.scheme == "https"
+            )
+            location = server_url
+        else:
+            # Initialize ChromaDB client with persistent storage
+            self.db_path.mkdir(exist_ok=True)
+            self.client = chromadb.PersistentClient(path=str(self.db_path))
+            location = str(self.db_path)
         
         # Create or get the main collection for the knowledge base
         self.collection = self.client.get_or_create_collection(
-            name="synapse_knowledge_base",
-            metadata={"description": "Main knowledge base for Synapse application"}
+            name=COLLECTION_NAME,
+            metadata=COLLECTION_METADATA
         )
         
         # Set up LlamaIndex components
         self._setup_llamaindex()
         
-        logger.info(f"ChromaDB client initialized with database at: {self.db_path}")
-        logger.info(f"Collection 'synapse_knowledge_base' ready with {self.collection.count()} documents")
+        # contextId -> (expiry time, result) for get_documents_by_context, least recently used first
+        self._context_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._context_cache_lock = threading.Lock()
+        
+        # Background writer for enqueue_documents, started on first use
+        self._write_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._write_error: Optional[Exception] = None
+        
+        logger.info(f"ChromaDB client initialized with database at: {location}")
+        logger.info(f"Collection '{COLLECTION_NAME}' ready with {self.collection.count()} documents")
         logger.info("LlamaIndex integration configured successfully")
+        
+        if warm:
+            self.warm_up()
+    
+    def warm_up(self) -> None:
+        """
+        Load the HNSW index and open the embedding API connection ahead of the first search.
+        
+        Chroma loads a collection's vector index lazily on the first query, and the first
+        embedding request pays for the TLS handshake. Failures are only logged, since the
+        first real search simply repeats these steps.
+        """
+        try:
+            sample = self.collection.get(limit=1, include=["embeddings"])
+            if sample["ids"]:
+                self.collection.query(query_embeddings=sample["embeddings"][:1], n_results=1, include=[])
+            self.embed_model.get_query_embedding("warmup")
+            logger.info("Vector store warmup complete")
+        except Exception as e:
+            logger.warning(f"Vector store warmup failed: {e}")
     
     def _setup_llamaindex(self):
         """Set up LlamaIndex StorageContext and configure global settings."""
@@ -60,12 +141,10 @@ class VectorStoreClient:
         self.storage_context = StorageContext.from_defaults(vector_store=self.vector_store)
         
         # Configure LlamaIndex global settings using custom embedding
-        from custom_openai_embedding import CustomOpenAIEmbedding
-        
-        embed_model = CustomOpenAIEmbedding(model="text-embedding-3-small")
+        self.embed_model = CustomOpenAIEmbedding(model="text-embedding-3-small")
         
         # Set global embedding model
-        LlamaSettings.embed_model = embed_model
+        LlamaSettings.embed_model = self.embed_model
         
         logger.info("LlamaIndex contexts configured with custom OpenAI embeddings and ChromaDB storage")
     
@@ -80,36 +159,139 @@ class VectorStoreClient:
     def add_documents(
         self,
         documents: List[str],
-        embeddings: List[List[float]],
+        embeddings: Union[List[List[float]], np.ndarray],
         metadatas: List[Dict[str, Any]],
-        ids: List[str]
+        ids: List[str],
+        batch_size: Optional[int] = None
     ) -> None:
         """
         Add documents with their embeddings to the vector store.
         
+        Rows are written in chunks of at most batch_size, since a single huge add
+        makes Chroma slow and holds every row in memory at once. IDs that are already
+        stored are skipped, so re-adding unchanged documents costs one ID lookup
+        instead of rewriting their HNSW nodes.
+        
         Args:
             documents: List of document text chunks
-            embeddings: List of embedding vectors for each document
+            embeddings: Embedding vectors for each document (list of lists or a 2-D array)
             metadatas: List of metadata dictionaries for each document
             ids: List of unique identifiers for each document
+            batch_size: Rows per add call (defaults to settings.CHROMA_ADD_BATCH_SIZE)
         """
+        batch_size = min(
+            batch_size or settings.CHROMA_ADD_BATCH_SIZE,
+            self.client.get_max_batch_size()
+        )
+        # One contiguous float32 matrix; the per-batch slices below are views into it
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
         try:
-            self.collection.add(
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                ids=ids
-            )
+            existing = set(self.collection.get(ids=ids, include=[])["ids"]) if ids else set()
+            if existing:
+                keep = [i for i, id_ in enumerate(ids) if id_ not in existing]
+                logger.info(f"Skipping {len(existing)} documents already in the vector store")
+                if not keep:
+                    return
+                documents = [documents[i] for i in keep]
+                metadatas = [metadatas[i] for i in keep]
+                ids = [ids[i] for i in keep]
+                vectors = vectors[keep]
+            for i in range(0, len(ids), batch_size):
+                self.collection.add(
+                    documents=documents[i:i + batch_size],
+                    embeddings=vectors[i:i + batch_size],
+                    metadatas=metadatas[i:i + batch_size],
+                    ids=ids[i:i + batch_size]
+                )
+            self.invalidate_context_cache({metadata.get("contextId") for metadata in metadatas})
             logger.info(f"Added {len(documents)} documents to the vector store")
         except Exception as e:
             logger.error(f"Error adding documents to vector store: {e}")
             raise
     
+    def embed_and_add(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        batch_size: int = 256
+    ) -> None:
+        """
+        Embed texts with the batch embedding API and add them to the vector store.
+        
+        Each chunk of batch_size texts is embedded in as few requests as the API
+        limits allow, and written by the background writer while the next chunk is
+        being embedded.
+        
+        Args:
+            texts: List of document text chunks
+            metadatas: List of metadata dictionaries for each document
+            ids: List of unique identifiers for each document
+            batch_size: Texts embedded per chunk
+        """
+        for i in range(0, len(texts), batch_size):
+            chunk = texts[i:i + batch_size]
+            embeddings = self.embed_model.get_text_embedding_batch(chunk, show_progress=False)
+            self.enqueue_documents(chunk, embeddings, metadatas[i:i + batch_size], ids[i:i + batch_size])
+        self.flush()
+    
+    def enqueue_documents(
+        self,
+        documents: List[str],
+        embeddings: Union[List[List[float]], np.ndarray],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str]
+    ) -> None:
+        """
+        Queue documents to be added by a background writer thread.
+        
+        The caller can embed the next batch while this one is written, so embedding
+        and Chroma inserts overlap. Blocks while WRITE_QUEUE_SIZE batches are pending;
+        call flush to wait for the writes and surface any error.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="chroma-writer", daemon=True)
+                self._writer.start()
+        self._write_queue.put({
+            "documents": documents,
+            "embeddings": embeddings,
+            "metadatas": metadatas,
+            "ids": ids
+        })
+    
+    def _write_loop(self) -> None:
+        """Add queued batches one at a time, keeping the first error for flush."""
+        while True:
+            batch = self._write_queue.get()
+            try:
+                if self._write_error is None:
+                    self.add_documents(**batch)
+            except Exception as e:
+                self._write_error = e
+            finally:
+                self._write_queue.task_done()
+    
+    def flush(self) -> None:
+        """
+        Wait until every queued batch has been written.
+        
+        Raises:
+            Exception: The first error raised by a background write; batches queued
+                after it are dropped
+        """
+        self._write_queue.join()
+        error, self._write_error = self._write_error, None
+        if error is not None:
+            raise error
+    
     def search_documents(
         self,
-        query_embedding: List[float],
+        query_embedding: Optional[Union[List[float], np.ndarray]] = None,
         n_results: int = 5,
-        where: Optional[Dict[str, Any]] = None
+        where: Optional[Dict[str, Any]] = None,
+        query_text: Optional[str] = None,
+        include: Sequence[str] = SEARCH_INCLUDE
     ) -> Dict[str, Any]:
         """
         Search for similar documents using embedding similarity.
@@ -118,22 +300,98 @@ class VectorStoreClient:
             query_embedding: The embedding vector of the query
             n_results: Number of results to return
             where: Optional metadata filter conditions
+            query_text: Raw query to embed instead of passing query_embedding; repeated
+                queries are served from the embedding model's in-process query cache
+            include: Result fields to return; add "embeddings" only when the vectors are needed
             
         Returns:
-            Dictionary containing search results with documents, metadatas, and distances
+            Dictionary containing search results with the ids and included fields
         """
+        if query_embedding is None:
+            if query_text is None:
+                raise ValueError("Either query_embedding or query_text is required")
+            query_embedding = self.embed_model.get_query_embedding(query_text)
         try:
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=np.asarray(query_embedding, dtype=np.float32).reshape(1, -1),
                 n_results=n_results,
-                where=where
+                where=where,
+                include=list(include)
             )
-            logger.info(f"Search completed, found {len(results['documents'][0])} results")
+            logger.info(f"Search completed, found {len(results['ids'][0])} results")
             return results
         except Exception as e:
             logger.error(f"Error searching documents: {e}")
             raise
     
+    async def asearch_documents(
+        self,
+        query_embedding: Optional[Union[List[float], np.ndarray]] = None,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        query_text: Optional[str] = None,
+        include: Sequence[str] = SEARCH_INCLUDE
+    ) -> Dict[str, Any]:
+        """
+        Async version of search_documents.
+        
+        The embedded Chroma client is blocking, so the query runs in a worker thread;
+        several searches can then be awaited together with asyncio.gather.
+        """
+        return await asyncio.to_thread(self.search_documents, query_embedding, n_results, where, query_text, include)
+    
+    async def abatch_search(
+        self,
+        query_embeddings: Union[List[List[float]], np.ndarray],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = SEARCH_INCLUDE
+    ) -> Dict[str, Any]:
+        """
+        Search for several queries in a single Chroma call.
+        
+        Args:
+            query_embeddings: Embedding vectors of the queries
+            n_results: Number of results to return per query
+            where: Optional metadata filter conditions applied to every query
+            include: Result fields to return; add "embeddings" only when the vectors are needed
+            
+        Returns:
+            Dictionary of search results with one entry per query in each field
+        """
+        try:
+            results = await asyncio.to_thread(
+                self.collection.query,
+                query_embeddings=np.ascontiguousarray(query_embeddings, dtype=np.float32),
+                n_results=n_results,
+                where=where,
+                include=list(include)
+            )
+            logger.info(f"Batch search completed for {len(query_embeddings)} queries")
+            return results
+        except Exception as e:
+            logger.error(f"Error searching documents: {e}")
+            raise
+    
+    def set_search_ef(self, search_ef: int) -> None:
+        """
+        Change the HNSW search breadth of the collection.
+        
+        Lower values answer queries faster at a small recall cost; higher values do the
+        opposite. Must be at least the n_results of the queries it serves. The value is
+        written to the collection's HNSW configuration: the legacy "hnsw:search_ef"
+        metadata key is only read when a collection is created.
+        
+        Args:
+            search_ef: Number of candidates explored per query
+        """
+        try:
+            self.collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+            logger.info(f"HNSW search_ef set to {search_ef}")
+        except Exception as e:
+            logger.error(f"Error setting HNSW search_ef: {e}")
+            raise
+    
     def get_document_count(self) -> int:
         """Get the total number of documents in the vector store."""
         return self.collection.count()
@@ -147,6 +405,7 @@ class VectorStoreClient:
         """
         try:
             self.collection.delete(ids=ids)
+            self.invalidate_context_cache()
             logger.info(f"Deleted {len(ids)} documents from the vector store")
         except Exception as e:
             logger.error(f"Error deleting documents: {e}")
@@ -156,35 +415,78 @@ class VectorStoreClient:
         """Clear all documents from the collection."""
         try:
             # Delete the collection and recreate it
-            self.client.delete_collection(name="synapse_knowledge_base")
+            self.client.delete_collection(name=COLLECTION_NAME)
             self.collection = self.client.get_or_create_collection(
-                name="synapse_knowledge_base",
-                metadata={"description": "Main knowledge base for Synapse application"}
+                name=COLLECTION_NAME,
+                metadata=COLLECTION_METADATA
             )
+            self.invalidate_context_cache()
             logger.info("Cleared all documents from the vector store")
         except Exception as e:
             logger.error(f"Error clearing collection: {e}")
             raise
     
-    def get_documents_by_context(self, context_id: str) -> Dict[str, Any]:
+    def invalidate_context_cache(self, context_ids: Optional[Iterable[str]] = None) -> None:
+        """
+        Drop cached get_documents_by_context results.
+        
+        Args:
+            context_ids: Contexts whose documents changed (None clears every context)
+        """
+        with self._context_cache_lock:
+            if context_ids is None:
+                self._context_cache.clear()
+            else:
+                for context_id in context_ids:
+                    self._context_cache.pop(context_id, None)
+    
+    def get_documents_by_context(
+        self,
+        context_id: str,
+        include: Sequence[str] = GET_INCLUDE
+    ) -> Dict[str, Any]:
         """
         Get all documents for a specific context ID.
         
+        The contextId filter is answered from Chroma's metadata value indices
+        (chromadb 0.5.4+) rather than a scan of every stored row. Results with the
+        default include are cached for CONTEXT_CACHE_TTL seconds; writes through this
+        client drop the affected contexts, while documents inserted elsewhere (e.g.
+        via LlamaIndex) show up once the entry expires.
+        
         Args:
             context_id: The context ID to filter by
+            include: Fields to return; add "embeddings" only when the vectors are needed
             
         Returns:
             Dictionary containing all documents for the given context
         """
+        cacheable = tuple(include) == GET_INCLUDE
+        if cacheable:
+            with self._context_cache_lock:
+                entry = self._context_cache.get(context_id)
+                if entry is not None and entry[0] >= time.monotonic():
+                    self._context_cache.move_to_end(context_id)
+                    return entry[1]
         try:
             results = self.collection.get(
-                where={"contextId": context_id}
+                where={"contextId": context_id},
+                include=list(include)
             )
-            logger.info(f"Found {len(results['documents'])} documents for context: {context_id}")
+            logger.info(f"Found {len(results['ids'])} documents for context: {context_id}")
+            if not cacheable:
+                return results
+            with self._context_cache_lock:
+                self._context_cache[context_id] = (time.monotonic() + CONTEXT_CACHE_TTL, results)
+                self._context_cache.move_to_end(context_id)
+                if len(self._context_cache) > CONTEXT_CACHE_SIZE:
+                    self._context_cache.popitem(last=False)
             return results
         except Exception as e:
             logger.error(f"Error getting documents by context: {e}")
             raise
 
-# Global instance for the application
-vector_store = VectorStoreClient()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_vector_store_client() -> VectorStoreClient:
+    """Create the application's vector store client on first use and return the same instance afterwards."""
+    return VectorStoreClient(db_path=settings.CHROMA_DB_PATH, server_url=settings.CHROMA_SERVER_URL)